@@ -1,10 +1,7 @@
 from http.server import BaseHTTPRequestHandler
 import json
-import base64
-import io
 import os
 import sys
-from PIL import Image
 import numpy as np
 import random
 from datetime import datetime
@@ -12,11 +9,15 @@ from datetime import datetime
 # Add parent directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-try:
-    import tensorflow as tf
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from model_cache import model_cache
+from lazy_imports import backend_available, module_available
+import inference
+import preprocessing
+import uploads
+
+# Checked with find_spec, without importing - the runtime itself loads on first inference
+TF_AVAILABLE = module_available('tensorflow')
+BACKEND_AVAILABLE = backend_available()
 
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
@@ -41,19 +42,20 @@ class handler(BaseHTTPRequestHandler):
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             
-            # Parse JSON data
+            # Raw image/* body, multipart/form-data upload or JSON base64 (legacy)
             try:
-                data = json.loads(post_data.decode('utf-8'))
-            except json.JSONDecodeError:
+                image_data, upload_mode = uploads.parse_upload(self.headers.get('Content-Type'), post_data)
+            except ValueError:
                 self.send_error_response("Invalid JSON data", 400)
                 return
             
-            if 'image' not in data:
+            if not image_data:
                 self.send_error_response("No image data provided", 400)
                 return
             
             # Try to load and use the actual model
-            result = self.analyze_with_model(data['image']) if TF_AVAILABLE else self.generate_mock_analysis()
+            result = self.analyze_with_model(image_data) if BACKEND_AVAILABLE else self.generate_mock_analysis()
+            result['upload_mode'] = upload_mode
             
             response = json.dumps(result)
             self.wfile.write(response.encode())
@@ -79,11 +81,11 @@ class handler(BaseHTTPRequestHandler):
     def analyze_with_model(self, image_data):
         """Analyze with actual TensorFlow model"""
         try:
-            # Load model (in production, this would be cached)
+            # Load model once per warm instance - later requests reuse the cached copy
             model_path = os.path.join(os.path.dirname(__file__), '..', 'models', 'optimized_cookware_acc_0.2898.keras')
             
             if os.path.exists(model_path):
-                model = tf.keras.models.load_model(model_path)
+                model, cache_info = model_cache.get(inference.select_model_file(model_path))
                 
                 # Preprocess image
                 processed_image = self.preprocess_image(image_data)
@@ -91,7 +93,7 @@ class handler(BaseHTTPRequestHandler):
                     return self.generate_mock_analysis()
                 
                 # Make prediction
-                predictions = model.predict(processed_image)
+                predictions = inference.predict(model, processed_image)
                 class_names = ['minor', 'moderate', 'new', 'severe']
                 predicted_class_idx = np.argmax(predictions[0])
                 predicted_class = class_names[predicted_class_idx]
@@ -106,7 +108,10 @@ class handler(BaseHTTPRequestHandler):
                     for i in range(len(class_names))
                 }
                 
-                return self.build_analysis_result(predicted_class, confidence, all_probabilities, use_model=True)
+                result = self.build_analysis_result(predicted_class, confidence, all_probabilities, use_model=True)
+                result['model_cache'] = cache_info
+                result['inference_backend'] = inference.backend_of(model)
+                return result
             else:
                 # Fallback to mock if model not found
                 return self.generate_mock_analysis()
@@ -119,28 +124,8 @@ class handler(BaseHTTPRequestHandler):
     def preprocess_image(self, image_data):
         """Preprocess image for model inference"""
         try:
-            # Decode base64 image
-            if 'data:image' in image_data:
-                image_data = image_data.split(',')[1]
-            
-            # Convert to PIL Image
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize to model input size
-            image = image.resize((224, 224))
-            
-            # Convert to numpy array and normalize
-            image_array = np.array(image) / 255.0
-            
-            # Add batch dimension
-            image_array = np.expand_dims(image_array, axis=0)
-            
-            return image_array
+            # Decode straight into this instance's reusable float32 input buffer
+            return preprocessing.preprocess_image(image_data)
         except Exception as e:
             print(f"Image preprocessing failed: {e}")
             return None
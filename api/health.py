@@ -7,11 +7,11 @@ from datetime import datetime
 # Add parent directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-try:
-    import tensorflow as tf
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from lazy_imports import backend_available, configured_backend, module_available
+
+# Checked with find_spec, without importing - health probes never pay the TF import
+TF_AVAILABLE = module_available('tensorflow')
+BACKEND_AVAILABLE = backend_available()
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -54,6 +54,8 @@ class handler(BaseHTTPRequestHandler):
                 'parameters': '~7M'
             },
             'tensorflow_available': TF_AVAILABLE,
+            'inference_backend': configured_backend(),
+            'backend_available': BACKEND_AVAILABLE,
             'model_loaded': model_exists,
             'available_models': available_models,
             'deployment': 'vercel-serverless',
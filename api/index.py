@@ -7,7 +7,7 @@ import logging
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import the main Flask app
-from app import app, load_model
+from app import app, ensure_model_loaded
 
 # Configure for serverless environment
 logging.basicConfig(level=logging.INFO)
@@ -15,7 +15,7 @@ logger = logging.getLogger(__name__)
 
 # Load model on cold start (Vercel will cache this)
 try:
-    model_loaded = load_model()
+    model_loaded = ensure_model_loaded()
     if model_loaded:
         logger.info("Model loaded successfully for Vercel deployment")
     else:
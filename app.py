@@ -1,85 +1,500 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import json
-import base64
-import io
 import os
-from PIL import Image
+import gc
+import glob
+import hmac
+import threading
+import time
+from contextlib import nullcontext
 import numpy as np
-import tensorflow as tf
 from datetime import datetime
 import logging
+from batching import BatchScheduler, batching_config
+import inference
+import metrics
+import preprocessing
+import uploads
+from result_cache import ResultCache, model_identity, result_cache_config
+from phash_index import NearDuplicateIndex, phash_config
+from jobs import JobRunner, JobStore, QueueFull, jobs_config
+from decode_stage import DecodeStage, StageBusy, decode_config
+from cascade import build_cascade, cascade_config
+from model_registry import (ModelEntry, ModelLoading, ModelRegistry, UnknownModel, estimate_bytes,
+                            model_registry_config, rss_bytes)
+from model_reload import ModelReloader, model_reload_config
+import cpu_topology
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Size the inference thread pools before TensorFlow / ONNX Runtime is imported. Under gunicorn
+# the config file already exported them for its worker count; a standalone process gets all cores.
+cpu_topology.apply_thread_env(cpu_topology.plan_topology(workers=int(os.environ.get('GUNICORN_WORKERS') or 1)))
+
 app = Flask(__name__, static_folder='public')
 CORS(app)
 
 # Global model variable
 model = None
+model_file = None
+loaded_model_identity = None
 class_names = ['minor', 'moderate', 'new', 'severe']
 
+# Confidence-gated cascade of cheaper models in front of `model` (CASCADE=1)
+cascade = None
+
+# The default model as one unit (model, cascade, cache identity). A hot reload replaces it
+# with a single assignment; requests keep the entry they started with.
+default_model = None
+_model_swap_lock = threading.Lock()
+
+# Watches models/ (and the admin trigger file) and hot-swaps the default model - per worker
+model_reloader = None
+_model_reloader_lock = threading.Lock()
+
+FALLBACK_MODELS = [
+    'proven_cookware_classifier_acc_0.4034.keras',
+    'original_cookware_classifier_acc_0.4489.keras'
+]
+
+# Every loaded model (the default one pinned) for per-request model selection
+model_registry = None
+_model_registry_lock = threading.Lock()
+
+# Result cache for re-submitted photos - per worker process
+result_cache = None
+_result_cache_lock = threading.Lock()
+
+# Perceptual-hash index so re-encoded / resized copies of a photo also hit the cache
+phash_index = None
+
+# Micro-batching scheduler - created lazily per worker process (threads don't survive fork)
+batch_scheduler = None
+_batch_scheduler_lock = threading.Lock()
+
+# Decode stage (thread or process pool) with backpressure in front of inference - per worker
+decode_stage = None
+_decode_stage_lock = threading.Lock()
+
+# Async job queue (SQLite, shared by all workers) and this worker's runner threads
+job_runner = None
+_job_runner_lock = threading.Lock()
+
+# Guards one-time model startup (import under gunicorn, __main__, Vercel entry)
+_model_init_lock = threading.Lock()
+_model_initialized = False
+_model_startup_thread = None
+_model_startup_lock = threading.Lock()
+
+# Last warm-up: model file, batch sizes and how long it took - /api/health reports it
+warmup_info = None
+
+def default_model_path():
+    """The .keras file to serve by default: the newest models/optimized_cookware_acc_*.keras,
+    else the first fallback model that exists, else None"""
+    optimized = glob.glob(os.path.join('models', 'optimized_cookware_acc_*.keras'))
+    if optimized:
+        return max(optimized, key=os.path.getmtime)
+    for fallback_model in FALLBACK_MODELS:
+        fallback_path = os.path.join('models', fallback_model)
+        if os.path.exists(fallback_path):
+            return fallback_path
+    return None
+
+def model_source():
+    """Identity of the file load_model would load now - the hot reload watcher compares it"""
+    keras_path = default_model_path()
+    return model_identity(inference.select_model_file(keras_path, warn=False)) if keras_path else None
+
 def load_model():
-    """Load the optimized cookware model"""
-    global model
+    """Load the optimized cookware model (or the first fallback model that exists)"""
     try:
-        # Use the optimized model as default
-        model_path = os.path.join('models', 'optimized_cookware_acc_0.2898.keras')
-        if os.path.exists(model_path):
-            model = tf.keras.models.load_model(model_path)
-            logger.info(f"Optimized model loaded successfully from {model_path}")
-            return True
-        else:
-            # Fallback to other models if optimized one is not found
-            fallback_models = [
-                'proven_cookware_classifier_acc_0.4034.keras',
-                'original_cookware_classifier_acc_0.4489.keras'
-            ]
-            for fallback_model in fallback_models:
-                fallback_path = os.path.join('models', fallback_model)
-                if os.path.exists(fallback_path):
-                    model = tf.keras.models.load_model(fallback_path)
-                    logger.info(f"Fallback model loaded from {fallback_path}")
-                    return True
-            
+        keras_path = default_model_path()
+        if keras_path is None:
             logger.error(f"No model files found in models directory")
-            model = None
             return False
+        entry = build_model_entry(keras_path)
+        activate_model(entry)
+        kind = 'Optimized' if entry.name == 'optimized' else 'Fallback'
+        logger.info(f"{kind} model loaded successfully from {entry.model_file}")
+        return True
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
-        model = None
         return False
 
-def preprocess_image(image_data):
-    """Preprocess image for model inference"""
+def build_model_entry(keras_path):
+    """Load keras_path (in the configured backend's format) plus its cascade as a default-model entry"""
+    model_path = inference.select_model_file(keras_path)
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    loaded = inference.load_model_file(model_path)
+    load_seconds = time.perf_counter() - start
+    metrics.model_loaded(os.path.basename(model_path), load_seconds)
+    grown = rss_bytes() - rss_before if rss_before is not None else None
+    entry = ModelEntry(keras_path, model_path, loaded, estimate_bytes(model_path, grown), load_seconds,
+                       pinned=True)
+    
+    # Put the configured cheaper models in front of it when CASCADE=1
+    config = cascade_config(keras_path)
+    if config['enabled']:
+        entry.cascade = build_cascade(entry.model_file, loaded, config)
+        if entry.cascade is not None:
+            # Cached results depend on the whole cascade, not just the final model
+            entry.identity = f"{entry.identity}|{entry.cascade.identity()}"
+    return entry
+
+def activate_model(entry):
+    """Serve entry as the default model from the next request on"""
+    global default_model, model, model_file, loaded_model_identity, cascade
+    with _model_swap_lock:
+        default_model = entry
+        model, model_file, loaded_model_identity, cascade = entry.model, entry.model_file, entry.identity, entry.cascade
+    registry = get_model_registry()
+    if registry is not None:
+        registry.register(entry)
+
+def reload_default_model():
+    """Hot reload: load and warm the current default model file while the old model keeps
+    serving, then swap it in. Returns the new model's source (raises if it fails to load)."""
+    keras_path = default_model_path()
+    if keras_path is None:
+        raise FileNotFoundError("No model files found in models directory")
+    entry = build_model_entry(keras_path)
+    if not warm_up_model(entry):
+        raise RuntimeError(f"{entry.model_file} failed its warm-up pass")
+    previous = default_model
+    activate_model(entry)
+    metrics.model_active(entry.model_file, entry.version)
+    logger.info(f"Default model swapped: {previous.model_file if previous else 'none'} -> {entry.model_file}")
+    del previous
+    # The preloaded model was frozen into the permanent generation (ensure_model_loaded), where
+    # its reference cycles are never collected. It is no longer shared, so let the GC see it again;
+    # the old entry is freed once the last request holding it finishes.
+    gc.unfreeze()
+    gc.collect()
+    return entry.source
+
+def warmup_batch_sizes():
+    """Batch sizes the model is served at: single images, full micro-batches and batch endpoint
+    chunks - or WARMUP_BATCH_SIZES, e.g. 1,4,8,16.
+
+    Largest first, always ending at 1: a TFLite interpreter keeps the tensors of the last
+    batch size it ran, so the single-image hot path must be the one left allocated.
+    """
+    configured = os.environ.get('WARMUP_BATCH_SIZES', '').strip()
+    if configured:
+        sizes = {max(1, int(size)) for size in configured.split(',') if size.strip()}
+    else:
+        chunk = max(1, int(os.environ.get('BATCH_ENDPOINT_CHUNK', 16)))
+        sizes = {batching_config()['max_batch_size'], chunk}
+    return sorted(sizes | {1}, reverse=True)
+
+def warm_up_model(entry=None):
+    """Run synthetic 224x224 batches at every served batch size (through every cascade stage),
+    so the first real requests don't pay for tracing, kernel selection and allocation"""
+    global warmup_info
+    entry = entry or default_model
+    if entry is None:
+        return False
+    sizes = warmup_batch_sizes()
+    timings = {}
+    start = time.perf_counter()
     try:
-        # Decode base64 image
-        if 'data:image' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        # Convert to PIL Image
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize to model input size (assuming 224x224)
-        image = image.resize((224, 224))
-        
-        # Convert to numpy array and normalize
-        image_array = np.array(image) / 255.0
-        
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
-        
-        return image_array
+        for size in sizes:
+            batch_start = time.perf_counter()
+            batch = np.zeros((size,) + inference.INPUT_SHAPE, dtype=np.float32)
+            if entry.cascade is not None:
+                entry.cascade.warm_up(batch)
+            else:
+                inference.predict(entry.model, batch)
+            timings[str(size)] = round((time.perf_counter() - batch_start) * 1000, 1)
     except Exception as e:
-        logger.error(f"Error preprocessing image: {str(e)}")
+        logger.error(f"Model warm-up failed: {str(e)}")
+        return False
+    seconds = time.perf_counter() - start
+    metrics.model_warmed(entry.model_file, seconds)
+    warmup_info = {
+        'model_file': entry.model_file,
+        'batch_sizes': sizes,
+        'seconds': round(seconds, 2),
+        'batch_ms': timings
+    }
+    logger.info(f"Model {entry.model_file} warmed at batch sizes {sizes} in {seconds:.1f}s")
+    return True
+
+def preload_requested():
+    """Whether to load the model at import - under gunicorn, in the master before fork.
+
+    PRELOAD_MODEL=1 always, 0 never. auto (gunicorn.conf.py's default) preloads only when
+    the model and every cascade stage load without TensorFlow (see inference.fork_safe);
+    Keras models are loaded by each worker after fork instead.
+    """
+    setting = os.environ.get('PRELOAD_MODEL', '0')
+    if setting != 'auto':
+        return setting == '1'
+    keras_path = default_model_path()
+    if keras_path is None:
+        return False
+    paths = [inference.select_model_file(keras_path, warn=False)]
+    config = cascade_config(keras_path)
+    if config['enabled']:
+        paths += config['models']
+    return all(inference.fork_safe(path) for path in paths)
+
+def ensure_model_loaded():
+    """Load and warm the model once per process.
+
+    When preloaded under gunicorn this runs in the master before fork, so every
+    worker inherits the weights copy-on-write instead of loading its own.
+    """
+    global _model_initialized
+    with _model_init_lock:
+        if not _model_initialized:
+            if load_model():
+                warm_up_model()
+            # Move startup objects out of the GC's view so collections in the
+            # workers don't touch (and un-share) the inherited pages
+            gc.freeze()
+            _model_initialized = True
+    return model is not None
+
+def is_ready():
+    """True once startup (model load and warm-up) has finished - with or without a model"""
+    return _model_initialized
+
+def start_model_startup():
+    """Load and warm the model on a background thread if nothing has yet (e.g. PRELOAD_MODEL=0),
+    so a health probe brings the app to ready without a real request paying for it"""
+    global _model_startup_thread
+    if _model_initialized or _model_startup_thread is not None:
+        return
+    # Not _model_init_lock - a load already running under it must not block the probe
+    with _model_startup_lock:
+        if _model_startup_thread is None:
+            _model_startup_thread = threading.Thread(target=ensure_model_loaded, name='model-startup', daemon=True)
+            _model_startup_thread.start()
+
+def get_model_registry():
+    """Return this process's model registry, or None when MODEL_REGISTRY=0"""
+    global model_registry
+    config = model_registry_config()
+    if not config['enabled']:
+        return None
+    if model_registry is None:
+        with _model_registry_lock:
+            if model_registry is None:
+                model_registry = ModelRegistry('models', max_bytes=config['max_bytes'],
+                                               load_timeout=config['load_timeout'],
+                                               warmup_sizes=warmup_batch_sizes())
+    return model_registry
+
+def preload_models():
+    """Start background loads of the MODEL_PRELOAD models - call in a worker, not the pre-fork master"""
+    registry = get_model_registry()
+    names = model_registry_config()['preload']
+    if registry is not None and names:
+        registry.preload(names)
+    return names
+
+def get_model_reloader():
+    """Return this process's hot reload watcher (started on first use), or None when MODEL_RELOAD=0"""
+    global model_reloader
+    config = model_reload_config()
+    if not config['enabled']:
         return None
+    if model_reloader is None:
+        with _model_reloader_lock:
+            if model_reloader is None:
+                model_reloader = ModelReloader(reload_default_model, model_source,
+                                               default_model.source if default_model is not None else None,
+                                               config['trigger_path'], poll_seconds=config['poll_seconds'])
+                model_reloader.start()
+                if default_model is not None:
+                    metrics.model_active(default_model.model_file, default_model.version)
+    return model_reloader
+
+def select_model(model_name):
+    """Model entry a request runs on - the default model unless model_name picks another.
+
+    Requests hold on to the entry they start with, so a hot reload never switches
+    model mid-request. None when no model is loaded. Raises UnknownModel or
+    ModelLoading (see model_registry.ModelRegistry.get).
+    """
+    current = default_model
+    if not model_name:
+        return current
+    registry = get_model_registry()
+    if registry is None:
+        raise UnknownModel(model_name)
+    entry = registry.get(model_name)
+    return current if current is not None and entry.keras_path == current.keras_path else entry
+
+def model_metadata(entry):
+    """Result fields naming the model that answered"""
+    if entry is None:
+        return {}
+    return {'model_file': entry.model_file, 'model_version': entry.version}
+
+def unknown_model_body(e):
+    registry = get_model_registry()
+    return {
+        'error': f"Unknown model {e.args[0]!r}",
+        'available': registry.stats()['available'] if registry is not None else []
+    }
+
+def get_batch_scheduler():
+    """Return this process's batch scheduler, or None when batching is disabled"""
+    global batch_scheduler
+    config = batching_config()
+    if config['max_batch_size'] <= 1:
+        return None
+    if batch_scheduler is None:
+        with _batch_scheduler_lock:
+            if batch_scheduler is None:
+                batch_scheduler = BatchScheduler(
+                    predict_model,
+                    max_batch_size=config['max_batch_size'],
+                    max_wait_ms=config['max_wait_ms']
+                )
+                logger.info(f"Micro-batching enabled: max_batch_size={config['max_batch_size']}, "
+                            f"max_wait_ms={config['max_wait_ms']}")
+    return batch_scheduler
+
+def get_result_cache():
+    """Return this process's result cache, or None when RESULT_CACHE=0"""
+    global result_cache
+    config = result_cache_config()
+    if not config['enabled']:
+        return None
+    if result_cache is None:
+        with _result_cache_lock:
+            if result_cache is None:
+                result_cache = ResultCache(max_bytes=config['max_bytes'], ttl_seconds=config['ttl_seconds'])
+    return result_cache
+
+def get_phash_index():
+    """Return this process's near-duplicate index, or None when PHASH_CACHE=0"""
+    global phash_index
+    config = phash_config()
+    if not config['enabled']:
+        return None
+    if phash_index is None:
+        with _result_cache_lock:
+            if phash_index is None:
+                phash_index = NearDuplicateIndex(max_distance=config['max_distance'],
+                                                 max_entries=config['max_entries'],
+                                                 ttl_seconds=config['ttl_seconds'])
+    return phash_index
+
+def get_decode_stage():
+    """Return this process's decode stage (its pool starts on first use)"""
+    global decode_stage
+    if decode_stage is None:
+        with _decode_stage_lock:
+            if decode_stage is None:
+                config = decode_config()
+                decode_stage = DecodeStage(mode=config['mode'], workers=config['workers'],
+                                           max_in_flight=config['max_in_flight'],
+                                           admit_timeout=config['admit_timeout'])
+    return decode_stage
+
+def get_job_runner():
+    """Return this process's job runner (started on first use), or None when JOBS=0"""
+    global job_runner
+    config = jobs_config()
+    if not config['enabled']:
+        return None
+    if job_runner is None:
+        with _job_runner_lock:
+            if job_runner is None:
+                store = JobStore(config['db_path'], max_queued=config['max_queued'],
+                                 max_attempts=config['max_attempts'], ttl_seconds=config['ttl_seconds'])
+                job_runner = JobRunner(store, run_job, workers=config['workers'],
+                                       poll_seconds=config['poll_seconds'])
+                job_runner.start()
+                logger.info(f"Job runner started: {config['workers']} thread(s), db={config['db_path']}")
+    return job_runner
+
+def predict_model(batch, entry):
+    """Forward pass of entry's model over a stacked batch -> (predictions, per-row metadata or None).
+
+    With the cascade enabled every row also reports the stage that answered it.
+    """
+    if entry.cascade is None:
+        return inference.predict(entry.model, batch), None
+    predictions, stage_of = entry.cascade.predict(batch)
+    return predictions, [{'cascade': entry.cascade.stage_info(stage)} for stage in stage_of]
+
+def run_inference(processed_image, entry):
+    """Predict one image, through the batching queue when it is enabled.
+
+    The queue batches default-model requests only; a model selected per request runs directly.
+    """
+    scheduler = get_batch_scheduler() if entry.pinned else None
+    if scheduler is not None:
+        # Items carry their entry, so a batch never mixes the old and new model across a hot reload
+        predictions, info = scheduler.predict(processed_image, context=entry)
+    else:
+        predictions, row_info = predict_model(processed_image, entry)
+        info = {'batched': False, 'batch_size': 1}
+        if row_info is not None:
+            info.update(row_info[0])
+    info['backend'] = inference.backend_of(entry.model)
+    return predictions, info
+
+def preprocess_image(image_data, with_hash=False):
+    """Preprocess image for model inference (optionally with its perceptual hash)"""
+    try:
+        # Decode on the decode stage's pool, scaled into this thread's reusable float32 buffer
+        processed_image, image_hash = get_decode_stage().preprocess(image_data, with_hash=with_hash)
+        return (processed_image, image_hash) if with_hash else processed_image
+    except Exception as e:
+        logger.error(f"Error preprocessing image: {str(e)}")
+        return (None, None) if with_hash else None
+
+def read_upload():
+    """Return (image, mode) for the current request.
+
+    Binary uploads skip the base64 + JSON round trip: multipart files are decoded
+    from werkzeug's spooled stream and raw bodies are read once as bytes.
+    """
+    if uploads.is_raw_image(request.content_type):
+        return request.get_data(cache=False), 'raw'
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('image')
+        return (upload.stream if upload else None), 'multipart'
+
+    data = request.get_json(silent=True)
+    if not data or 'image' not in data:
+        return None, 'json'
+    return data['image'], 'json'
+
+def read_batch_upload():
+    """Return (images, mode) for a batch request - multipart 'images' files or JSON {"images": [...]}"""
+    if request.mimetype == 'multipart/form-data':
+        files = request.files.getlist('images') or request.files.getlist('image')
+        return [upload.stream for upload in files], 'multipart'
+
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('images'), list):
+        return [], 'json'
+    return data['images'], 'json'
+
+def predict_batch(batch, entry):
+    """Run a stacked batch through the model in forward passes of at most BATCH_ENDPOINT_CHUNK images.
+
+    Returns (predictions, forward passes, per-row metadata or None).
+    """
+    chunk = max(1, int(os.environ.get('BATCH_ENDPOINT_CHUNK', 16)))
+    outputs = [predict_model(batch[i:i + chunk], entry) for i in range(0, len(batch), chunk)]
+    predictions = np.concatenate([output[0] for output in outputs], axis=0)
+    row_info = None
+    if outputs[0][1] is not None:
+        row_info = [info for output in outputs for info in output[1]]
+    return predictions, len(outputs), row_info
 
 def get_condition_details(predicted_class, confidence):
     """Get detailed condition information based on prediction"""
@@ -132,6 +547,74 @@ def get_condition_details(predicted_class, confidence):
     
     return conditions.get(predicted_class, conditions['moderate'])
 
+def mock_prediction():
+    """Fallback answer when no model is loaded or prediction fails"""
+    return 'minor', 0.85, {
+        'minor': {'probability': 0.85, 'percentage': '85.0%'},
+        'moderate': {'probability': 0.10, 'percentage': '10.0%'},
+        'new': {'probability': 0.03, 'percentage': '3.0%'},
+        'severe': {'probability': 0.02, 'percentage': '2.0%'}
+    }
+
+def interpret_predictions(probabilities):
+    """(predicted_class, confidence, all_probabilities) from one row of model output"""
+    predicted_class_idx = int(np.argmax(probabilities))
+    predicted_class = class_names[predicted_class_idx]
+    confidence = float(probabilities[predicted_class_idx])
+    
+    # Get all probabilities
+    all_probabilities = {
+        class_names[i]: {
+            'probability': float(probabilities[i]),
+            'percentage': f"{probabilities[i] * 100:.1f}%"
+        }
+        for i in range(len(class_names))
+    }
+    return predicted_class, confidence, all_probabilities
+
+def build_analysis_result(predicted_class, confidence, all_probabilities, **metadata):
+    """Response body for one analysed image, with extra metadata fields appended"""
+    condition_details = get_condition_details(predicted_class, confidence)
+    
+    result = {
+        'predicted_class': predicted_class,
+        'confidence': confidence,
+        'confidence_percent': f"{confidence * 100:.1f}%",
+        'status': condition_details['status'],
+        'emoji': condition_details['emoji'],
+        'condition': condition_details['condition'],
+        'recommended_action': condition_details['action'],
+        'urgency_level': condition_details['urgency'],
+        'safety_assessment': condition_details['safety'],
+        'condition_score': condition_details['score'],
+        'replacement_timeline': condition_details['timeline'],
+        'care_tips': condition_details['tips'],
+        'all_probabilities': all_probabilities,
+        'analysis_id': int(np.random.randint(1000, 9999)),
+        'timestamp': datetime.now().isoformat() + 'Z',
+        'user': 'basil03p',
+        'model_name': 'Optimized Cookware Classifier v2.0',
+        'model_accuracy': '71.02%',  # Optimized model accuracy (100% - 28.98% loss)
+        'model_file': model_file or 'none'
+    }
+    result.update(metadata)
+    return result
+
+@app.before_request
+def track_request_start():
+    """In-flight gauge and start time for API requests (static files and /metrics aren't counted)"""
+    if request.path.startswith('/api/'):
+        g.request_started = time.perf_counter()
+        metrics.request_started()
+
+@app.after_request
+def track_request_end(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.request_finished(request.url_rule.rule if request.url_rule else 'unmatched',
+                                 response.status_code, time.perf_counter() - started)
+    return response
+
 @app.route('/')
 def serve_index():
     """Serve the main HTML file"""
@@ -142,24 +625,97 @@ def serve_static(path):
     """Serve static files"""
     return send_from_directory('public', path)
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
+def health_status():
+    """Health check body - shared with the ASGI app. Until the model is loaded and warmed,
+    'ready' is false and the endpoints answer 503, so load balancers hold traffic back."""
+    ready = is_ready()
+    if not ready:
+        start_model_startup()
     model_status = "loaded" if model is not None else "not_loaded"
-    model_info = "optimized_cookware_acc_0.2898.keras" if model is not None else "none"
+    model_info = model_file if model is not None else "none"
     
-    return jsonify({
-        'status': 'healthy',
+    return {
+        'status': 'healthy' if ready else 'warming_up',
+        'ready': ready,
         'timestamp': datetime.now().isoformat() + 'Z',
         'service': 'Cookware Damage Analyzer API',
         'version': '1.0.0',
         'model_loaded': model is not None,
         'model_status': model_status,
         'model_info': model_info,
+        'inference_backend': inference.backend_of(model) if model is not None else None,
+        'model_version': default_model.version if default_model is not None else None,
+        'cascade_stages': cascade.names if cascade is not None else None,
+        'warmup': warmup_info,
         'user': 'basil03p',
         'deployment': 'koyeb'
+    }
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    body = health_status()
+    return jsonify(body), 200 if body['ready'] else 503
+
+def cpu_stats():
+    """Cores and thread pools this worker runs with - from the plan, so unset or empty
+    TF_NUM_*_THREADS (an entry point that never exported them) fall back to its defaults"""
+    plan = cpu_topology.plan_topology(workers=int(os.environ.get('GUNICORN_WORKERS') or 1))
+    return {
+        'cores': plan['cores'],
+        'profile': plan['profile'],
+        'affinity': cpu_topology.current_affinity(),
+        'intra_op_threads': plan['intra_op_threads'],
+        'inter_op_threads': plan['inter_op_threads']
+    }
+
+@app.route('/api/stats', methods=['GET'])
+def inference_stats():
+    """Inference queue statistics for tuning batch size against latency"""
+    scheduler = get_batch_scheduler()
+    return jsonify({
+        'timestamp': datetime.now().isoformat() + 'Z',
+        'pid': os.getpid(),
+        'batching_enabled': scheduler is not None,
+        'batching': scheduler.stats() if scheduler is not None else None,
+        'result_cache': result_cache.stats() if result_cache is not None else None,
+        'near_duplicate_index': phash_index.stats() if phash_index is not None else None,
+        'jobs': job_runner.store.stats() if job_runner is not None else None,
+        'pipeline': decode_stage.stats() if decode_stage is not None else None,
+        'cascade': cascade.stats() if cascade is not None else None,
+        'models': model_registry.stats() if model_registry is not None else None,
+        'model_reload': model_reloader.stats() if model_reloader is not None else None,
+        'cpu': cpu_stats()
     })
 
+@app.route('/api/admin/reload', methods=['POST'])
+def admin_reload():
+    """Hot-reload the default model in every worker - needs ADMIN_TOKEN in X-Admin-Token"""
+    token = model_reload_config()['admin_token']
+    reloader = get_model_reloader()
+    if not token or reloader is None:
+        return jsonify({'error': 'Admin API is disabled'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    
+    # This worker reloads straight away; the others follow via the shared trigger file
+    reloader.request(broadcast=True)
+    keras_path = default_model_path()
+    return jsonify({
+        'status': 'reloading',
+        'serving': model_file,
+        'loading': os.path.basename(keras_path) if keras_path else None,
+        'trigger_path': reloader.trigger_path
+    }), 202
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition - covers every gunicorn worker in multiprocess mode"""
+    if job_runner is not None:
+        metrics.jobs_queued(job_runner.store.stats()['queued'])
+    payload, content_type = metrics.render()
+    return Response(payload, content_type=content_type)
+
 @app.route('/api/analyze', methods=['POST', 'OPTIONS'])
 def analyze_cookware():
     """Analyze cookware damage from uploaded image"""
@@ -168,105 +724,419 @@ def analyze_cookware():
         # Handle preflight requests
         response = jsonify({'status': 'ok'})
         response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, X-Model')
         response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
         return response
     
     try:
-        # Get JSON data
-        data = request.get_json()
+        # Raw image/* body, multipart/form-data upload or JSON base64 (legacy)
+        image_data, upload_mode = read_upload()
         
-        if not data or 'image' not in data:
+        if not image_data:
             return jsonify({'error': 'No image data provided'}), 400
         
-        image_data = data['image']
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'message': 'Analysis failed'
+        }), 500
+    
+    body, status, headers = analyze_image_data(image_data, upload_mode, requested_model())
+    with metrics.timed('serialize'):
+        response = jsonify(body)
+    response.headers.update(headers)
+    return response, status
+
+def requested_model():
+    """Model picked by the client with ?model=<name or version> or an X-Model header"""
+    return request.args.get('model') or request.headers.get('X-Model')
+
+def analyze_image_data(image_data, upload_mode, model_name=None):
+    """Analyze one uploaded image -> (response body, HTTP status, extra headers).
+
+    Shared by the Flask route and the ASGI app (asgi.py), which runs it on an executor thread.
+    model_name picks a registry model instead of the default one.
+    """
+    try:
+        # Lazily load the model if it wasn't preloaded (e.g. PRELOAD_MODEL=0)
+        if not _model_initialized:
+            ensure_model_loaded()
+        
+        # The model this request runs on, start to finish - even if a hot reload swaps the default
+        entry = select_model(model_name)
+        # The caches hold the default model's results, so a model selected per request skips them
+        use_caches = entry is not None and entry.pinned
         
-        # Preprocess image
-        processed_image = preprocess_image(image_data)
+        # Content-addressed result cache - a re-submitted photo skips decode and inference
+        cache = get_result_cache() if use_caches else None
+        cache_key = None
+        cached_predictions = None
+        if cache is not None:
+            image_data = preprocessing.image_bytes(image_data)
+            cache_key = cache.key(image_data, entry.identity)
+            cached_predictions = cache.get(cache_key)
+            metrics.cache_lookup('exact', cached_predictions is not None)
         
-        if processed_image is None:
-            return jsonify({'error': 'Failed to process image'}), 400
+        cache_match = 'exact' if cached_predictions is not None else None
         
-        # Make prediction if model is loaded
-        if model is not None:
-            try:
-                predictions = model.predict(processed_image)
-                predicted_class_idx = np.argmax(predictions[0])
-                predicted_class = class_names[predicted_class_idx]
-                confidence = float(predictions[0][predicted_class_idx])
+        # Decode and inference run under the pipeline's admission limit (backpressure);
+        # exact cache hits skip both stages
+        stage = get_decode_stage()
+        timing = {}
+        admission = stage.admit() if cached_predictions is None else nullcontext()
+        with admission as queue_wait_ms:
+            if queue_wait_ms is not None:
+                timing['queue_wait_ms'] = round(queue_wait_ms, 2)
+            
+            # Preprocess image
+            near_index = get_phash_index() if use_caches else None
+            image_hash = None
+            if cached_predictions is None:
+                start = time.perf_counter()
+                if near_index is not None:
+                    processed_image, image_hash = preprocess_image(image_data, with_hash=True)
+                else:
+                    processed_image = preprocess_image(image_data)
+                timing['decode_ms'] = round((time.perf_counter() - start) * 1000, 2)
                 
-                # Get all probabilities
-                all_probabilities = {
-                    class_names[i]: {
-                        'probability': float(predictions[0][i]),
-                        'percentage': f"{predictions[0][i] * 100:.1f}%"
-                    }
-                    for i in range(len(class_names))
-                }
+                if processed_image is None:
+                    return {'error': 'Failed to process image'}, 400, {}
                 
-            except Exception as e:
-                logger.error(f"Model prediction error: {str(e)}")
-                # Fallback to mock data if model fails
-                predicted_class = 'minor'
-                confidence = 0.85
-                all_probabilities = {
-                    'minor': {'probability': 0.85, 'percentage': '85.0%'},
-                    'moderate': {'probability': 0.10, 'percentage': '10.0%'},
-                    'new': {'probability': 0.03, 'percentage': '3.0%'},
-                    'severe': {'probability': 0.02, 'percentage': '2.0%'}
-                }
-        else:
-            # Fallback to mock analysis if no model
-            logger.warning("Model not loaded, using mock analysis")
-            predicted_class = 'minor'
-            confidence = 0.85
-            all_probabilities = {
-                'minor': {'probability': 0.85, 'percentage': '85.0%'},
-                'moderate': {'probability': 0.10, 'percentage': '10.0%'},
-                'new': {'probability': 0.03, 'percentage': '3.0%'},
-                'severe': {'probability': 0.02, 'percentage': '2.0%'}
-            }
-        
-        # Get condition details
-        condition_details = get_condition_details(predicted_class, confidence)
+                # Near-duplicate lookup - a re-compressed or rescaled copy reuses the cached result
+                if near_index is not None:
+                    near_match = near_index.lookup(image_hash, entry.identity)
+                    metrics.cache_lookup('near', near_match is not None)
+                    if near_match is not None:
+                        cached_predictions, hash_distance = near_match
+                        cache_match = 'near'
+            
+            # Make prediction if model is loaded
+            if entry is not None:
+                try:
+                    if cached_predictions is not None:
+                        predictions = cached_predictions
+                        inference_info = {'cached': True, 'backend': inference.backend_of(entry.model)}
+                        if cache_key is not None and cache_match == 'near':
+                            cache.put(cache_key, predictions)
+                    else:
+                        start = time.perf_counter()
+                        predictions, inference_info = run_inference(processed_image, entry)
+                        inference_ms = (time.perf_counter() - start) * 1000
+                        stage.timings.record('inference', inference_ms)
+                        timing['inference_ms'] = round(inference_ms, 2)
+                        predictions = np.array(predictions, dtype=np.float32)
+                        if cache_key is not None:
+                            cache.put(cache_key, predictions)
+                        if image_hash is not None and entry is default_model:
+                            near_index.add(image_hash, entry.identity, predictions)
+                    predicted_class, confidence, all_probabilities = interpret_predictions(predictions[0])
+                
+                except Exception as e:
+                    logger.error(f"Model prediction error: {str(e)}")
+                    # Fallback to mock data if model fails
+                    inference_info = None
+                    predicted_class, confidence, all_probabilities = mock_prediction()
+            else:
+                # Fallback to mock analysis if no model
+                logger.warning("Model not loaded, using mock analysis")
+                inference_info = None
+                predicted_class, confidence, all_probabilities = mock_prediction()
         
         # Build response
-        result = {
-            'predicted_class': predicted_class,
-            'confidence': confidence,
-            'confidence_percent': f"{confidence * 100:.1f}%",
-            'status': condition_details['status'],
-            'emoji': condition_details['emoji'],
-            'condition': condition_details['condition'],
-            'recommended_action': condition_details['action'],
-            'urgency_level': condition_details['urgency'],
-            'safety_assessment': condition_details['safety'],
-            'condition_score': condition_details['score'],
-            'replacement_timeline': condition_details['timeline'],
-            'care_tips': condition_details['tips'],
-            'all_probabilities': all_probabilities,
-            'analysis_id': np.random.randint(1000, 9999),
-            'timestamp': datetime.now().isoformat() + 'Z',
-            'user': 'basil03p',
-            'model_name': 'Optimized Cookware Classifier v2.0',
-            'model_accuracy': '71.02%',  # Optimized model accuracy (100% - 28.98% loss)
-            'model_file': 'optimized_cookware_acc_0.2898.keras'
-        }
+        result = build_analysis_result(
+            predicted_class, confidence, all_probabilities,
+            inference=inference_info,
+            timing=timing,
+            upload_mode=upload_mode,
+            result_cache={
+                'hit': cache_match is not None,
+                'match': cache_match,
+                'hamming_distance': hash_distance if cache_match == 'near' else None
+            } if cache is not None or near_index is not None else None,
+            **model_metadata(entry)
+        )
         
-        return jsonify(result)
+        return result, 200, {}
         
+    except UnknownModel as e:
+        return unknown_model_body(e), 400, {}
+    except ModelLoading as e:
+        logger.warning(f"Analysis rejected: {str(e)}")
+        return {'error': 'Model is loading - retry later', 'message': str(e)}, 503, {'Retry-After': '5'}
+    except StageBusy as e:
+        logger.warning(f"Analysis rejected: {str(e)}")
+        return {'error': 'Server busy - retry later', 'message': str(e)}, 503, {'Retry-After': '1'}
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
-        return jsonify({
+        return {
             'error': str(e),
             'message': 'Analysis failed'
+        }, 500, {}
+
+def iter_batch_results(images, timing, entry):
+    """Yield (index, result) for every image, one forward-pass chunk at a time.
+
+    Each chunk is decoded in parallel, predicted and handed back before the next
+    chunk is decoded, so a caller that stops iterating stops all further work.
+    timing accumulates queue_wait_ms, decode_ms, inference_ms and forward_passes as chunks finish.
+    entry is the model every chunk runs on (see select_model), None for mock results.
+    """
+    stage = get_decode_stage()
+    # A chunk never asks for more pipeline slots than exist, or it could only enter an empty pipeline
+    chunk = min(max(1, int(os.environ.get('BATCH_ENDPOINT_CHUNK', 16))), stage.max_in_flight)
+    metadata = model_metadata(entry)
+    for offset in range(0, len(images), chunk):
+        part = images[offset:offset + chunk]
+        results = {}
+        predictions = None
+        row_info = None
+        
+        # The chunk holds its pipeline slots from decode until its forward pass is done
+        with stage.admit(len(part)) as queue_wait_ms:
+            timing['queue_wait_ms'] += queue_wait_ms
+            start = time.perf_counter()
+            batch, indices, errors = stage.preprocess_batch(part)
+            timing['decode_ms'] += (time.perf_counter() - start) * 1000
+            
+            for index, message in errors.items():
+                results[index] = {'index': offset + index, 'error': 'Failed to process image', 'detail': message}
+            
+            if indices and entry is not None:
+                start = time.perf_counter()
+                try:
+                    predictions, passes, row_info = predict_batch(batch, entry)
+                    timing['forward_passes'] += passes
+                except Exception as e:
+                    logger.error(f"Batch prediction error: {str(e)}")
+                    for index in indices:
+                        results[index] = {'index': offset + index, 'error': 'Prediction failed', 'detail': str(e)}
+                    indices = []
+                inference_ms = (time.perf_counter() - start) * 1000
+                stage.timings.record('inference', inference_ms)
+                timing['inference_ms'] += inference_ms
+            elif indices:
+                logger.warning("Model not loaded, using mock analysis")
+        
+        for row, index in enumerate(indices):
+            if predictions is not None:
+                predicted_class, confidence, all_probabilities = interpret_predictions(predictions[row])
+            else:
+                predicted_class, confidence, all_probabilities = mock_prediction()
+            results[index] = build_analysis_result(predicted_class, confidence, all_probabilities,
+                                                   index=offset + index, **metadata,
+                                                   **(row_info[row] if row_info is not None else {}))
+        
+        for index in sorted(results):
+            yield offset + index, results[index]
+
+def analyze_images(images, upload_mode=None, entry=None):
+    """Buffered batch response body: every result in upload order plus counts and timings.
+
+    entry defaults to the current default model.
+    """
+    entry = entry or default_model
+    timing = {'queue_wait_ms': 0.0, 'decode_ms': 0.0, 'inference_ms': 0.0, 'forward_passes': 0}
+    results = [result for _, result in iter_batch_results(images, timing, entry)]
+    
+    succeeded = sum(1 for result in results if 'error' not in result)
+    return {
+        'results': results,
+        'count': len(images),
+        'succeeded': succeeded,
+        'failed': len(images) - succeeded,
+        'upload_mode': upload_mode,
+        'inference_backend': inference.backend_of(entry.model) if entry is not None else None,
+        'timing': {key: round(value, 1) for key, value in timing.items()},
+        **model_metadata(entry)
+    }
+
+def run_job(images):
+    """Job runner entry point - the same body /api/analyze/batch returns"""
+    if not _model_initialized:
+        ensure_model_loaded()
+    return analyze_images(images, upload_mode='job')
+
+def wants_stream():
+    """NDJSON streaming is asked for with ?stream=1 or Accept: application/x-ndjson"""
+    return (request.args.get('stream') == '1'
+            or 'application/x-ndjson' in request.headers.get('Accept', ''))
+
+def stream_batch_results(images, upload_mode, entry):
+    """NDJSON body: one result per line as each chunk finishes, then a summary line.
+
+    When the client goes away the WSGI server closes this generator, which raises
+    GeneratorExit at the pending yield - no further chunks are decoded or predicted.
+    """
+    timing = {'queue_wait_ms': 0.0, 'decode_ms': 0.0, 'inference_ms': 0.0, 'forward_passes': 0}
+    sent = 0
+    failed = 0
+    try:
+        for _, result in iter_batch_results(images, timing, entry):
+            failed += 'error' in result
+            sent += 1
+            yield json.dumps(result) + '\n'
+        
+        yield json.dumps({
+            'summary': {
+                'count': len(images),
+                'succeeded': sent - failed,
+                'failed': failed,
+                'upload_mode': upload_mode,
+                'inference_backend': inference.backend_of(entry.model) if entry is not None else None,
+                'timing': {key: round(value, 1) for key, value in timing.items()},
+                **model_metadata(entry)
+            }
+        }) + '\n'
+    except GeneratorExit:
+        logger.info(f"Batch stream client disconnected after {sent} of {len(images)} results - stopping")
+        raise
+    except Exception as e:
+        # Headers are already out, so report the failure in-band
+        logger.error(f"Batch stream error: {str(e)}")
+        yield json.dumps({'error': str(e), 'message': 'Batch analysis failed', 'sent': sent}) + '\n'
+
+@app.route('/api/analyze/batch', methods=['POST', 'OPTIONS'])
+def analyze_batch():
+    """Analyze many cookware images in one request - results come back in upload order"""
+    
+    if request.method == 'OPTIONS':
+        # Handle preflight requests
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Accept, X-Model')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response
+    
+    try:
+        images, upload_mode = read_batch_upload()
+        
+        if not images:
+            return jsonify({'error': 'No images provided'}), 400
+        
+        stream = wants_stream()
+        if stream:
+            max_images = int(os.environ.get('BATCH_STREAM_MAX_IMAGES', 512))
+        else:
+            max_images = int(os.environ.get('BATCH_ENDPOINT_MAX_IMAGES', 64))
+        if len(images) > max_images:
+            return jsonify({'error': f'Too many images - at most {max_images} per batch'}), 413
+        
+        # Lazily load the model if it wasn't preloaded (e.g. PRELOAD_MODEL=0)
+        if not _model_initialized:
+            ensure_model_loaded()
+        entry = select_model(requested_model())
+        
+        if stream:
+            # stream_with_context keeps the request (and its uploaded files) open while streaming
+            response = Response(stream_with_context(stream_batch_results(images, upload_mode, entry)),
+                                mimetype='application/x-ndjson')
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'  # don't let a proxy buffer the stream
+            return response
+        
+        body = analyze_images(images, upload_mode, entry)
+        with metrics.timed('serialize'):
+            return jsonify(body)
+        
+    except UnknownModel as e:
+        return jsonify(unknown_model_body(e)), 400
+    except ModelLoading as e:
+        logger.warning(f"Batch analysis rejected: {str(e)}")
+        response = jsonify({'error': 'Model is loading - retry later', 'message': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except StageBusy as e:
+        logger.warning(f"Batch analysis rejected: {str(e)}")
+        response = jsonify({'error': 'Server busy - retry later', 'message': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    except Exception as e:
+        logger.error(f"Batch analysis error: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'message': 'Batch analysis failed'
         }), 500
 
+@app.route('/api/jobs', methods=['POST', 'OPTIONS'])
+def submit_job():
+    """Queue images for background analysis - poll GET /api/jobs/<id> for the result"""
+    
+    if request.method == 'OPTIONS':
+        # Handle preflight requests
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response
+    
+    runner = get_job_runner()
+    if runner is None:
+        return jsonify({'error': 'Job API is disabled'}), 404
+    
+    try:
+        # Same uploads as /api/analyze/batch, or a single image as for /api/analyze
+        images, upload_mode = read_batch_upload()
+        if not images:
+            image, upload_mode = read_upload()
+            images = [image] if image else []
+        
+        if not images:
+            return jsonify({'error': 'No images provided'}), 400
+        
+        max_images = jobs_config()['max_images']
+        if len(images) > max_images:
+            return jsonify({'error': f'Too many images - at most {max_images} per job'}), 413
+        
+        try:
+            job_id = runner.store.submit([preprocessing.image_bytes(image) for image in images], upload_mode)
+        except QueueFull:
+            response = jsonify({'error': 'Job queue is full - retry later'})
+            response.headers['Retry-After'] = '5'
+            return response, 429
+        runner.notify()
+        
+        response = jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'image_count': len(images),
+            'status_url': f'/api/jobs/{job_id}'
+        })
+        response.headers['Location'] = f'/api/jobs/{job_id}'
+        return response, 202
+        
+    except Exception as e:
+        logger.error(f"Job submission error: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'message': 'Job submission failed'
+        }), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status of a queued job - includes the batch result once it is done"""
+    runner = get_job_runner()
+    if runner is None:
+        return jsonify({'error': 'Job API is disabled'}), 404
+    
+    job = runner.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job id'}), 404
+    return jsonify(job)
+
+# Load the model at import time when asked to - gunicorn.conf.py sets PRELOAD_MODEL=auto so
+# fork-safe runtimes load once in the master during preload_app
+if preload_requested():
+    if not ensure_model_loaded():
+        logger.warning("Model failed to load - app will run with mock analysis")
+
 if __name__ == '__main__':
     # Load model on startup
-    model_loaded = load_model()
+    model_loaded = ensure_model_loaded()
     if not model_loaded:
         logger.warning("Model failed to load - app will run with mock analysis")
+    preload_models()
+    get_model_reloader()
     
     # Get port from environment or use 8080 (Koyeb default)
     port = int(os.environ.get('PORT', 8080))
@@ -0,0 +1,208 @@
+"""
+ASGI serving mode for the Cookware Damage Analyzer (uvicorn or gunicorn's UvicornWorker)
+Request bodies are received asynchronously, so a slow mobile upload costs a coroutine
+instead of a worker; only complete uploads are handed to a bounded executor, where the
+Flask app's pipeline (decode stage, batching queue, result caches) does the work.
+Every other path (the UI, /api/analyze/batch, /api/jobs, /api/stats, admin) is served by
+the Flask app itself through uvicorn's WSGI adapter, so this is a drop-in for app:app.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+    SERVER_MODE=asgi gunicorn --config gunicorn.conf.py asgi:app
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import app as analyzer
+import lazy_imports
+import metrics
+import uploads
+from cpu_topology import available_cores
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = int(float(os.environ.get('ASGI_MAX_BODY_MB', 20)) * 1024 * 1024)
+INFERENCE_THREADS = int(os.environ.get('ASGI_INFERENCE_THREADS', 0)) or available_cores()
+
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+PREFLIGHT_HEADERS = CORS_HEADERS + [
+    (b'access-control-allow-headers', b'Content-Type, X-Model'),
+    (b'access-control-allow-methods', b'POST, OPTIONS')
+]
+
+# Created on first use so nothing is started in a pre-fork gunicorn master
+_executor = None
+_slots = None
+_wsgi_app = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='asgi-analyze')
+    return _executor
+
+
+def wsgi_app():
+    """The Flask app behind uvicorn's WSGI adapter - serves every path not handled natively"""
+    global _wsgi_app
+    if _wsgi_app is None:
+        WSGIMiddleware = lazy_imports.import_module('uvicorn.middleware.wsgi').WSGIMiddleware
+        _wsgi_app = WSGIMiddleware(analyzer.app, workers=INFERENCE_THREADS)
+    return _wsgi_app
+
+
+def native_route(scope):
+    """True for the requests served here without going through Flask"""
+    method, path = scope['method'], scope['path']
+    return (path == '/api/analyze' and method in ('POST', 'OPTIONS')) or (path == '/api/health' and method == 'GET')
+
+
+def analysis_slots():
+    """Uploads waiting for the executor wait here, asynchronously, instead of in its queue"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(INFERENCE_THREADS)
+    return _slots
+
+
+async def send_json(send, status, body, headers=None):
+    with metrics.timed('serialize'):
+        payload = json.dumps(body).encode('utf-8')
+    response_headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode('latin-1'))
+    ] + CORS_HEADERS
+    for name, value in (headers or {}).items():
+        response_headers.append((name.lower().encode('latin-1'), str(value).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def read_body(receive, content_length):
+    """Whole request body, awaited chunk by chunk; None if the client disconnected.
+
+    Raises ValueError when the body is larger than ASGI_MAX_BODY_MB.
+    """
+    if content_length is not None and content_length > MAX_BODY_BYTES:
+        raise ValueError('Upload too large')
+    chunks = []
+    received = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        received += len(chunk)
+        if received > MAX_BODY_BYTES:
+            raise ValueError('Upload too large')
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def analyze(scope, receive, send):
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+    content_length = headers.get('content-length')
+    try:
+        body = await read_body(receive, int(content_length) if content_length else None)
+    except ValueError as e:
+        await send_json(send, 413, {'error': str(e), 'max_mb': MAX_BODY_BYTES / 1024 / 1024})
+        return
+    if body is None:
+        return  # client went away mid-upload - nothing was decoded or predicted
+
+    try:
+        image_data, upload_mode = uploads.parse_upload(headers.get('content-type', ''), body)
+    except ValueError:
+        await send_json(send, 400, {'error': 'Invalid JSON data'})
+        return
+    if not image_data:
+        await send_json(send, 400, {'error': 'No image data provided'})
+        return
+
+    # Same per-request model choice as the Flask app: ?model=<name or version> or X-Model
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    model_name = query.get('model', [None])[0] or headers.get('x-model')
+
+    loop = asyncio.get_running_loop()
+    async with analysis_slots():
+        result, status, extra_headers = await loop.run_in_executor(
+            executor(), analyzer.analyze_image_data, image_data, upload_mode, model_name
+        )
+    await send_json(send, status, result, extra_headers)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Load and warm the model off the event loop (a no-op if it was preloaded)
+            if os.environ.get('PRELOAD_MODEL', '1') != '0':
+                loaded = await asyncio.get_running_loop().run_in_executor(executor(), analyzer.ensure_model_loaded)
+                if not loaded:
+                    logger.warning("Model failed to load - app will run with mock analysis")
+            analyzer.preload_models()
+            analyzer.get_model_reloader()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _executor is not None:
+                _executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def send_metrics(send):
+    payload, content_type = metrics.render()
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', content_type.encode('latin-1'))]})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def app(scope, receive, send):
+    """ASGI application: /api/analyze, /api/health and /metrics natively, everything else via Flask"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    if scope['path'] == '/metrics':
+        await send_metrics(send)
+        return
+    if not native_route(scope):
+        # Flask's own before/after_request hooks count these requests
+        await wsgi_app()(scope, receive, send)
+        return
+
+    # Same in-flight gauge and request histogram as the Flask app's before/after_request hooks
+    started = time.perf_counter()
+    status = {}
+
+    async def tracked_send(message):
+        if message['type'] == 'http.response.start':
+            status['code'] = message['status']
+        await send(message)
+
+    metrics.request_started()
+    try:
+        await route(scope, receive, tracked_send)
+    finally:
+        metrics.request_finished(scope['path'], status.get('code', 499), time.perf_counter() - started)
+
+
+async def route(scope, receive, send):
+    method, path = scope['method'], scope['path']
+    if path == '/api/analyze' and method == 'POST':
+        await analyze(scope, receive, send)
+    elif path == '/api/analyze' and method == 'OPTIONS':
+        await send({'type': 'http.response.start', 'status': 200, 'headers': PREFLIGHT_HEADERS})
+        await send({'type': 'http.response.body', 'body': b''})
+    else:
+        body = analyzer.health_status()
+        await send_json(send, 200 if body['ready'] else 503, body)
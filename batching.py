@@ -0,0 +1,175 @@
+"""
+Dynamic micro-batching for model inference
+Concurrent requests are collected into one batch (up to max_batch_size or max_wait_ms)
+and served by a single forward pass
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """Collects single-image requests and runs them through the model in batches"""
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=5.0, delay_window=1000):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        # Metrics
+        self.batch_size_histogram = {}
+        self.batches = 0
+        self.requests = 0
+        self.queue_delay_total_ms = 0.0
+        self.queue_delay_max_ms = 0.0
+        self._recent_delays_ms = deque(maxlen=delay_window)
+
+    def start(self):
+        """Start the batching thread (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name='batch-scheduler', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the batching thread after the current batch"""
+        self._stopped = True
+        self._queue.put(None)
+
+    def submit(self, image_array, context=None):
+        """Queue one preprocessed image of shape (1, H, W, C) and return its Future.
+
+        A context (e.g. the model the request started on) is passed to predict_fn;
+        only items with the same context share a forward pass.
+        """
+        self.start()
+        future = Future()
+        self._queue.put((image_array, future, time.perf_counter(), context))
+        metrics.queue_changed('batch', 1)
+        return future
+
+    def predict(self, image_array, timeout=None, context=None):
+        """Blocking submit - returns (predictions of shape (1, classes), batch_info)"""
+        return self.submit(image_array, context).result(timeout=timeout)
+
+    def queue_depth(self):
+        """Requests waiting for a batch slot"""
+        return self._queue.qsize()
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopped = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stopped:
+            batch = self._collect()
+            # Normally one group; a hot model swap can leave old- and new-model items in one collection
+            for context, group in _by_context(batch):
+                self._process(group, context)
+
+    def _process(self, batch, context=None):
+        """One forward pass for the whole batch, results routed back in order"""
+        dispatched = time.perf_counter()
+        size = len(batch)
+        metrics.queue_changed('batch', -size)
+        try:
+            inputs = np.concatenate([item[0] for item in batch], axis=0)
+            predictions = self.predict_fn(inputs) if context is None else self.predict_fn(inputs, context)
+            # predict_fn may also return per-row metadata, e.g. the answering cascade stage
+            predictions, row_info = predictions if isinstance(predictions, tuple) else (predictions, None)
+        except Exception as e:
+            logger.error(f"Batched prediction failed: {str(e)}")
+            for _, future, _, _ in batch:
+                future.set_exception(e)
+            return
+
+        inference_ms = (time.perf_counter() - dispatched) * 1000
+        with self._lock:
+            self.batches += 1
+            self.requests += size
+            self.batch_size_histogram[size] = self.batch_size_histogram.get(size, 0) + 1
+
+            for i, (_, future, enqueued, _) in enumerate(batch):
+                delay_ms = (dispatched - enqueued) * 1000
+                self.queue_delay_total_ms += delay_ms
+                self.queue_delay_max_ms = max(self.queue_delay_max_ms, delay_ms)
+                self._recent_delays_ms.append(delay_ms)
+                metrics.observe('batch_queue_wait', delay_ms / 1000)
+                info = {
+                    'batched': True,
+                    'batch_size': size,
+                    'queue_delay_ms': round(delay_ms, 2),
+                    'inference_ms': round(inference_ms, 2)
+                }
+                if row_info is not None:
+                    info.update(row_info[i])
+                future.set_result((predictions[i:i + 1], info))
+
+    def stats(self):
+        """Queue depth, batch-size histogram and queueing delay percentiles"""
+        with self._lock:
+            delays = sorted(self._recent_delays_ms)
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queue_depth': self.queue_depth(),
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self.batch_size_histogram.items())},
+                'queue_delay_ms': {
+                    'mean': round(self.queue_delay_total_ms / self.requests, 2) if self.requests else 0.0,
+                    'p50': metrics.percentile(delays, 50),
+                    'p99': metrics.percentile(delays, 99),
+                    'max': round(self.queue_delay_max_ms, 2)
+                }
+            }
+
+
+def _by_context(batch):
+    """[(context, items)] in arrival order, one group per distinct context"""
+    groups = {}
+    for item in batch:
+        groups.setdefault(id(item[3]), (item[3], []))[1].append(item)
+    return list(groups.values())
+
+
+def batching_config():
+    """Batching settings from the environment - BATCH_MAX_SIZE=1 disables batching"""
+    return {
+        'max_batch_size': int(os.environ.get('BATCH_MAX_SIZE', 1)),
+        'max_wait_ms': float(os.environ.get('BATCH_MAX_WAIT_MS', 5))
+    }
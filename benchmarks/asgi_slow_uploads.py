@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Slow-upload concurrency for the ASGI app, driven in-process (no server or sockets)
+N clients trickle their uploads over --upload-seconds while fast clients post normally;
+reports fast-request latency and the threads in use, showing that slow bodies don't hold
+inference capacity the way a sync worker per upload would
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from sample_images import make_image_bytes
+
+
+async def call(app, body, chunk_delay=0.0, chunks=1):
+    """Run one POST /api/analyze through the ASGI app - (status, seconds)"""
+    size = max(1, len(body) // chunks)
+    parts = [body[i:i + size] for i in range(0, len(body), size)]
+    messages = [{'type': 'http.request', 'body': part, 'more_body': i < len(parts) - 1}
+                for i, part in enumerate(parts)]
+    status = {}
+
+    async def receive():
+        if messages:
+            if chunk_delay:
+                await asyncio.sleep(chunk_delay)
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status['code'] = message['status']
+
+    scope = {
+        'type': 'http', 'method': 'POST', 'path': '/api/analyze',
+        'headers': [(b'content-type', b'image/jpeg'), (b'content-length', str(len(body)).encode())]
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return status.get('code'), time.perf_counter() - start
+
+
+async def run(app, image_bytes, slow_clients, fast_clients, upload_seconds):
+    chunks = 20
+    slow = [asyncio.create_task(call(app, image_bytes, upload_seconds / chunks, chunks))
+            for _ in range(slow_clients)]
+    await asyncio.sleep(upload_seconds / 10)  # slow uploads are now mid-body
+    peak_threads = threading.active_count()
+    fast = await asyncio.gather(*(call(app, image_bytes) for _ in range(fast_clients)))
+    peak_threads = max(peak_threads, threading.active_count())
+    slow_results = await asyncio.gather(*slow)
+    fast_ms = sorted(seconds * 1000 for _, seconds in fast)
+    return {
+        'slow_clients': slow_clients,
+        'fast_clients': fast_clients,
+        'fast_p50_ms': round(fast_ms[len(fast_ms) // 2], 1),
+        'fast_max_ms': round(fast_ms[-1], 1),
+        'fast_errors': sum(1 for code, _ in fast if code != 200),
+        'slow_errors': sum(1 for code, _ in slow_results if code != 200),
+        'threads_in_use': peak_threads
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--slow', default='0,100,1000', help='concurrent slow uploads')
+    parser.add_argument('--fast', type=int, default=20)
+    parser.add_argument('--upload-seconds', type=float, default=5.0)
+    parser.add_argument('--size', default='1280x960')
+    args = parser.parse_args()
+
+    os.environ.setdefault('PRELOAD_MODEL', '1')
+    os.environ['RESULT_CACHE'] = '0'
+    os.environ['PHASH_CACHE'] = '0'
+    import asgi
+
+    width, height = (int(v) for v in args.size.split('x'))
+    image_bytes = make_image_bytes(width, height)
+
+    async def sweep():
+        await call(asgi.app, image_bytes)  # warm up
+        return [await run(asgi.app, image_bytes, int(n), args.fast, args.upload_seconds)
+                for n in args.slow.split(',')]
+
+    # One event loop for the whole sweep - the app's semaphore belongs to it
+    results = asyncio.run(sweep())
+    print(json.dumps({
+        'model_loaded': asgi.analyzer.model is not None,
+        'inference_threads': asgi.INFERENCE_THREADS,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Time to first result and peak Python heap for /api/analyze/batch, buffered JSON vs NDJSON stream
+Runs the Flask app in-process; load a model in models/ for numbers that include inference
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from sample_images import make_image_bytes
+
+
+def post_batch(client, images, stream):
+    files = [(io.BytesIO(image_bytes), f'pan_{i}.jpg', 'image/jpeg') for i, image_bytes in enumerate(images)]
+    url = '/api/analyze/batch?stream=1' if stream else '/api/analyze/batch'
+    return client.post(url, data={'images': files}, content_type='multipart/form-data', buffered=False)
+
+
+def measure(client, images, stream):
+    """(first_result_ms, total_ms, peak_heap_mb, lines)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = post_batch(client, images, stream)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    first = None
+    lines = 0
+    for chunk in response.response:
+        if first is None:
+            first = time.perf_counter() - start
+        lines += chunk.count(b'\n') if stream else 0
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response.close()
+    return first * 1000, total * 1000, peak / 1024 / 1024, lines
+
+
+def measure_disconnect(client, images, keep):
+    """Read `keep` lines then drop the connection - how long until the server side stops"""
+    response = post_batch(client, images, stream=True)
+    lines = 0
+    for chunk in response.response:
+        lines += chunk.count(b'\n')
+        if lines >= keep:
+            break
+    start = time.perf_counter()
+    response.close()  # what the WSGI server does when the client goes away
+    return lines, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--size', default='1280x960')
+    args = parser.parse_args()
+
+    os.environ.setdefault('PRELOAD_MODEL', '1')
+    os.environ.setdefault('BATCH_ENDPOINT_MAX_IMAGES', str(args.count))
+    os.environ.setdefault('BATCH_STREAM_MAX_IMAGES', str(args.count))
+    from app import app
+    import app as app_module
+    client = app.test_client()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    images = [make_image_bytes(width, height, seed=i) for i in range(args.count)]
+    post_batch(client, images[:2], stream=False).close()  # warm up
+
+    results = {}
+    for mode, stream in (('buffered', False), ('ndjson', True)):
+        first_ms, total_ms, peak_mb, lines = measure(client, images, stream)
+        results[mode] = {
+            'first_result_ms': round(first_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'peak_heap_mb': round(peak_mb, 1),
+            'lines': lines if stream else None
+        }
+
+    received, close_ms = measure_disconnect(client, images, keep=1)
+    results['disconnect'] = {'lines_read': received, 'close_ms': round(close_ms, 1)}
+
+    print(json.dumps({
+        'model_loaded': app_module.model is not None,
+        'images': args.count,
+        'size': args.size,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Throughput of /api/analyze/batch against N single /api/analyze calls
+Runs the Flask app in-process; load a model in models/ for numbers that include inference
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from sample_images import make_image_bytes
+
+
+def run_singles(client, images):
+    start = time.perf_counter()
+    for image_bytes in images:
+        response = client.post('/api/analyze', data=image_bytes, content_type='image/jpeg')
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return time.perf_counter() - start
+
+
+def run_batch(client, images):
+    files = [(io.BytesIO(image_bytes), f'pan_{i}.jpg', 'image/jpeg') for i, image_bytes in enumerate(images)]
+    start = time.perf_counter()
+    response = client.post('/api/analyze/batch', data={'images': files}, content_type='multipart/form-data')
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed, response.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--counts', default='10,25,50')
+    parser.add_argument('--size', default='1280x960')
+    args = parser.parse_args()
+
+    # Distinct images anyway, but keep the caches out of the comparison
+    os.environ.setdefault('PRELOAD_MODEL', '1')
+    os.environ['RESULT_CACHE'] = '0'
+    os.environ['PHASH_CACHE'] = '0'
+    from app import app
+    import app as app_module
+    client = app.test_client()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    results = []
+    for count in (int(c) for c in args.counts.split(',')):
+        images = [make_image_bytes(width, height, seed=i) for i in range(count)]
+        run_singles(client, images[:1])  # warm up both paths
+        run_batch(client, images[:2])
+
+        singles_s = run_singles(client, images)
+        batch_s, body = run_batch(client, images)
+        results.append({
+            'images': count,
+            'single_calls_s': round(singles_s, 3),
+            'batch_call_s': round(batch_s, 3),
+            'single_images_per_s': round(count / singles_s, 1),
+            'batch_images_per_s': round(count / batch_s, 1),
+            'speedup': round(singles_s / batch_s, 2),
+            'batch_timing': body['timing'],
+            'failed': body['failed']
+        })
+
+    print(json.dumps({
+        'model_loaded': app_module.model is not None,
+        'size': args.size,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
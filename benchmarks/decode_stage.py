@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Decode stage modes under concurrency: thread pool vs process pool
+Drives /api/analyze in-process from N client threads and reports throughput plus the
+per-stage timings from /api/stats, showing whether decode or inference is the bottleneck
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from sample_images import make_image_bytes
+
+
+def drive(app, images, concurrency, requests_per_client):
+    """Requests/s with `concurrency` clients posting raw images in a loop"""
+    errors = []
+
+    def client_loop(offset):
+        client = app.test_client()
+        for i in range(requests_per_client):
+            image_bytes = images[(offset + i) % len(images)]
+            response = client.post('/api/analyze', data=image_bytes, content_type='image/jpeg')
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=client_loop, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return concurrency * requests_per_client / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', default='thread,process')
+    parser.add_argument('--concurrency', default='1,4,8')
+    parser.add_argument('--requests', type=int, default=20, help='requests per client')
+    parser.add_argument('--size', default='4032x3024')
+    args = parser.parse_args()
+
+    # Distinct uploads every time - keep the caches out of the measurement
+    os.environ.setdefault('PRELOAD_MODEL', '1')
+    os.environ['RESULT_CACHE'] = '0'
+    os.environ['PHASH_CACHE'] = '0'
+    import app as app_module
+
+    width, height = (int(v) for v in args.size.split('x'))
+    images = [make_image_bytes(width, height, seed=i) for i in range(16)]
+
+    results = []
+    for mode in args.modes.split(','):
+        os.environ['DECODE_MODE'] = mode
+        app_module.decode_stage = None  # rebuilt from the environment on the next request
+        drive(app_module.app, images[:2], 1, 2)  # start the pool
+
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            app_module.decode_stage.timings = type(app_module.decode_stage.timings)()
+            throughput, errors = drive(app_module.app, images, concurrency, args.requests)
+            pipeline = app_module.decode_stage.stats()
+            results.append({
+                'mode': mode,
+                'concurrency': concurrency,
+                'requests_per_s': round(throughput, 1),
+                'errors': len(errors),
+                'workers': pipeline['workers'],
+                'stages': pipeline['stages'],
+                'bottleneck': pipeline['bottleneck']
+            })
+
+    print(json.dumps({
+        'model_loaded': app_module.model is not None,
+        'size': args.size,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
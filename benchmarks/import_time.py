@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for every serving entry point
+Each entry point is imported in a fresh interpreter; the report shows how long the
+import took and whether it pulled in TensorFlow / ONNX Runtime
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+ENTRY_POINTS = [
+    'app.py',
+    'api/index.py',
+    'api/analyze.py',
+    'api/health.py',
+    'netlify/functions/analyze.py',
+    'netlify/functions/health.py'
+]
+
+CHILD_SCRIPT = r'''
+import importlib.util, json, os, sys, time
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('entry_point', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    'import_ms': elapsed_ms,
+    'tensorflow_imported': 'tensorflow' in sys.modules,
+    'onnxruntime_imported': 'onnxruntime' in sys.modules,
+    'numpy_imported': 'numpy' in sys.modules,
+    'modules_loaded': len(sys.modules)
+}))
+'''
+
+
+def measure(entry_point, prewarm):
+    """Import one entry point in a fresh interpreter"""
+    env = dict(os.environ)
+    # Isolate the import itself unless model preloading is explicitly requested
+    env['PREWARM_MODEL'] = '1' if prewarm else '0'
+    env['PRELOAD_MODEL'] = '1' if prewarm else '0'
+    result = subprocess.run([sys.executable, '-c', CHILD_SCRIPT, os.path.join(ROOT, entry_point)],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--prewarm', action='store_true', help='also load the model at import where supported')
+    parser.add_argument('--entry', action='append', help='only measure these entry points')
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'prewarm': args.prewarm, 'entry_points': {}}
+    for entry_point in args.entry or ENTRY_POINTS:
+        samples = [measure(entry_point, args.prewarm) for _ in range(args.repeats)]
+        errors = [s['error'] for s in samples if 'error' in s]
+        if errors:
+            report['entry_points'][entry_point] = {'error': errors[0]}
+            continue
+        timings = sorted(s['import_ms'] for s in samples)
+        report['entry_points'][entry_point] = {
+            'median_ms': round(statistics.median(timings), 1),
+            'min_ms': round(timings[0], 1),
+            'max_ms': round(timings[-1], 1),
+            'tensorflow_imported': samples[0]['tensorflow_imported'],
+            'onnxruntime_imported': samples[0]['onnxruntime_imported'],
+            'numpy_imported': samples[0]['numpy_imported'],
+            'modules_loaded': samples[0]['modules_loaded']
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
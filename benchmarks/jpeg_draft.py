@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+JPEG draft-mode decoding benchmark
+Compares full decode + resize against draft (DCT-scaled) decode + resize across image
+sizes, and checks the preprocessed input - and optionally the model output - stays in tolerance
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+import numpy as np
+
+import preprocessing
+from sample_images import make_image_bytes
+
+
+def decode(image_bytes, draft):
+    """float32 (1, 224, 224, 3) copy of the preprocessed image"""
+    image = preprocessing.load_image(image_bytes, draft=draft)
+    return (np.asarray(image, dtype=np.float32) * preprocessing.SCALE)[np.newaxis]
+
+
+def mean_ms(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='640x480,1280x960,2048x1536,4032x3024')
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--model', help='optional .keras/.tflite/.onnx file to compare predictions')
+    parser.add_argument('--tolerance', type=float, default=0.02, help='max allowed probability difference')
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        import inference
+        model = inference.load_model_file(args.model)
+
+    results = []
+    for size in args.sizes.split(','):
+        width, height = (int(v) for v in size.split('x'))
+        image_bytes = make_image_bytes(width, height, fmt='JPEG')
+
+        full = decode(image_bytes, draft=False)
+        drafted = decode(image_bytes, draft=True)
+        entry = {
+            'size': size,
+            'megapixels': round(width * height / 1e6, 1),
+            'full_decode_ms': round(mean_ms(lambda: decode(image_bytes, False), args.repeats), 2),
+            'draft_decode_ms': round(mean_ms(lambda: decode(image_bytes, True), args.repeats), 2),
+            'input_max_abs_diff': round(float(np.max(np.abs(full - drafted))), 4),
+            'input_mean_abs_diff': round(float(np.mean(np.abs(full - drafted))), 5)
+        }
+        entry['speedup'] = round(entry['full_decode_ms'] / entry['draft_decode_ms'], 2)
+
+        if model is not None:
+            import inference
+            full_probs = inference.predict(model, full)[0]
+            draft_probs = inference.predict(model, drafted)[0]
+            diff = float(np.max(np.abs(full_probs - draft_probs)))
+            entry['prediction_max_abs_diff'] = round(diff, 5)
+            entry['same_top1'] = bool(full_probs.argmax() == draft_probs.argmax())
+            entry['within_tolerance'] = diff <= args.tolerance
+
+        results.append(entry)
+
+    report = {'oversample': preprocessing.JPEG_DRAFT_OVERSAMPLE, 'repeats': args.repeats, 'results': results}
+    print(json.dumps(report, indent=2))
+    if model is not None and not all(r['within_tolerance'] for r in results):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
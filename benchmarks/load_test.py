@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Replayable load test for the analyze endpoints
+Builds (or reuses) a corpus of cookware images at several sizes, formats and upload modes,
+replays it against the Flask app, the Vercel handler, the Netlify handler or a running
+server at each concurrency level, and writes throughput, latency percentiles, CPU and RSS
+as JSON so runs can be compared over time.
+
+    python benchmarks/load_test.py --target flask --concurrency 1,4,16 --output results/flask.json
+    python benchmarks/load_test.py --target url --url http://localhost:8080 --server-pid <gunicorn master pid>
+"""
+
+import argparse
+import base64
+import http.client
+import importlib.util
+import json
+import math
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from sample_images import make_image, encode_image
+
+DEFAULT_CORPUS = os.path.join(ROOT, 'benchmarks', 'corpus')
+SIZES = ('640x480', '1280x960', '1920x1440', '4032x3024')
+FORMATS = ('JPEG', 'PNG', 'WEBP')
+MODES = ('raw', 'multipart', 'json')
+BOUNDARY = 'cookwareLoadTestBoundary'
+
+# Settings that change performance - recorded with every run
+CONFIG_VARS = ('INFERENCE_BACKEND', 'TFLITE_VARIANT', 'BATCH_MAX_SIZE', 'BATCH_MAX_WAIT_MS', 'RESULT_CACHE',
+               'PHASH_CACHE', 'DECODE_MODE', 'DECODE_WORKERS', 'JPEG_DRAFT', 'GUNICORN_WORKERS', 'GUNICORN_THREADS',
+               'CPU_PROFILE', 'CPU_AFFINITY', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+
+# --- Corpus -----------------------------------------------------------------
+
+def generate_corpus(directory, per_combo=2):
+    """Write images for every size x format (per_combo seeds each) plus corpus.jsonl"""
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    seed = 0
+    for size in SIZES:
+        width, height = (int(v) for v in size.split('x'))
+        for fmt in FORMATS:
+            for _ in range(per_combo):
+                name = f'pan_{size}_{seed}.{fmt.lower()}'
+                with open(os.path.join(directory, name), 'wb') as f:
+                    f.write(encode_image(make_image(width, height, seed), fmt))
+                entries.append({'file': name, 'format': fmt, 'size': size,
+                                'mode': MODES[seed % len(MODES)]})
+                seed += 1
+    with open(os.path.join(directory, 'corpus.jsonl'), 'w') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+    return entries
+
+
+def load_corpus(directory, modes=None):
+    """Entries of corpus.jsonl with the image bytes and the request body already built"""
+    manifest = os.path.join(directory, 'corpus.jsonl')
+    if not os.path.exists(manifest):
+        generate_corpus(directory)
+    entries = []
+    with open(manifest) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if modes:
+                entry['mode'] = modes[len(entries) % len(modes)]
+            with open(os.path.join(directory, entry['file']), 'rb') as image_file:
+                image_bytes = image_file.read()
+            entry['content_type'], entry['body'] = build_request(image_bytes, entry['format'], entry['mode'])
+            entries.append(entry)
+    return entries
+
+
+def build_request(image_bytes, fmt, mode):
+    """(content_type, body) for one upload mode"""
+    mime = 'image/' + fmt.lower()
+    if mode == 'raw':
+        return mime, image_bytes
+    if mode == 'multipart':
+        body = (
+            f'--{BOUNDARY}\r\n'
+            f'Content-Disposition: form-data; name="image"; filename="pan.{fmt.lower()}"\r\n'
+            f'Content-Type: {mime}\r\n\r\n'
+        ).encode() + image_bytes + f'\r\n--{BOUNDARY}--\r\n'.encode()
+        return f'multipart/form-data; boundary={BOUNDARY}', body
+    data_url = f"data:{mime};base64,{base64.b64encode(image_bytes).decode('ascii')}"
+    return 'application/json', json.dumps({'image': data_url}).encode()
+
+
+# --- Targets ------------------------------------------------------------------
+# Each target is a callable(entry) -> HTTP status, safe to call from many threads
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def flask_target():
+    from app import app
+    local = threading.local()
+
+    def call(entry):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.post('/api/analyze', data=entry['body'], content_type=entry['content_type'])
+        return response.status_code
+
+    return call, None
+
+
+def netlify_target():
+    module = load_module('netlify_analyze', os.path.join(ROOT, 'netlify', 'functions', 'analyze.py'))
+
+    def call(entry):
+        binary = entry['mode'] != 'json'
+        event = {
+            'httpMethod': 'POST',
+            'headers': {'Content-Type': entry['content_type']},
+            'body': base64.b64encode(entry['body']).decode('ascii') if binary else entry['body'].decode(),
+            'isBase64Encoded': binary
+        }
+        return module.handler(event, None)['statusCode']
+
+    return call, None
+
+
+def http_target(url):
+    parsed = urllib.parse.urlsplit(url)
+    path = (parsed.path.rstrip('/') or '') + '/api/analyze'
+    local = threading.local()
+
+    def call(entry):
+        connection = getattr(local, 'connection', None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=120)
+        try:
+            connection.request('POST', path, body=entry['body'], headers={'Content-Type': entry['content_type']})
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            local.connection = None
+            return 0
+
+    return call
+
+
+def vercel_target():
+    """The Vercel BaseHTTPRequestHandler served on a local port, driven over HTTP"""
+    module = load_module('vercel_analyze', os.path.join(ROOT, 'api', 'analyze.py'))
+
+    class Handler(module.handler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return http_target(f'http://{host}:{port}'), server.shutdown
+
+
+# --- Resource sampling ----------------------------------------------------------
+
+def process_tree(pid):
+    """pid and its children (gunicorn master + workers)"""
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            for child in f.read().split():
+                pids.extend(process_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def cpu_seconds(pid):
+    """utime + stime of pid and its children, from /proc"""
+    ticks = os.sysconf('SC_CLK_TCK')
+    total = 0.0
+    for p in process_tree(pid):
+        try:
+            with open(f'/proc/{p}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def rss_mb(pid):
+    total = 0
+    for p in process_tree(pid):
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+class ResourceSampler:
+    """Peak RSS of the measured process tree, sampled in the background"""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, rss_mb(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, rss_mb(self.pid))
+
+
+# --- Replay -------------------------------------------------------------------
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def replay(call, corpus, concurrency, total_requests, pid):
+    """Send total_requests corpus entries round-robin from `concurrency` threads"""
+    latencies = [None] * total_requests
+    statuses = [None] * total_requests
+
+    def one(i):
+        start = time.perf_counter()
+        statuses[i] = call(corpus[i % len(corpus)])
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+    cpu_start = cpu_seconds(pid)
+    with ResourceSampler(pid) as sampler:
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(total_requests)))
+        wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds(pid) - cpu_start
+
+    ok = [latency for latency, status in zip(latencies, statuses) if status == 200]
+    return {
+        'concurrency': concurrency,
+        'requests': total_requests,
+        'errors': total_requests - len(ok),
+        'status_codes': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        'throughput_rps': round(len(ok) / wall, 2),
+        'latency_ms': {
+            'mean': round(statistics.mean(ok), 1) if ok else None,
+            'p50': round(percentile(ok, 50), 1) if ok else None,
+            'p95': round(percentile(ok, 95), 1) if ok else None,
+            'p99': round(percentile(ok, 99), 1) if ok else None,
+            'max': round(max(ok), 1) if ok else None
+        },
+        'wall_s': round(wall, 3),
+        'cpu_s': round(cpu, 3),
+        'cpu_utilization': round(cpu / wall, 2),
+        'peak_rss_mb': round(sampler.peak_mb, 1)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=('flask', 'vercel', 'netlify', 'url'), default='flask')
+    parser.add_argument('--url', default='http://localhost:8080', help='server for --target url')
+    parser.add_argument('--server-pid', type=int, help='measure CPU/RSS of this process tree (--target url)')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='directory with corpus.jsonl (generated if missing)')
+    parser.add_argument('--regenerate', action='store_true', help='rebuild the corpus first')
+    parser.add_argument('--modes', help='override upload modes, e.g. raw or raw,json')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=100, help='requests per concurrency level')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--with-cache', action='store_true',
+                        help='leave the result / near-duplicate caches on (the corpus repeats, so most requests hit)')
+    parser.add_argument('--output', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    # The corpus is replayed round-robin - keep the caches out of the measurement unless asked for.
+    # A --target url server reads its own environment: start it with the same settings.
+    if not args.with_cache:
+        os.environ['RESULT_CACHE'] = '0'
+        os.environ['PHASH_CACHE'] = '0'
+
+    if args.regenerate:
+        generate_corpus(args.corpus)
+    corpus = load_corpus(args.corpus, args.modes.split(',') if args.modes else None)
+
+    # Import-time preload would be counted as load otherwise; the first warmup request loads lazily
+    os.environ.setdefault('PRELOAD_MODEL', '0')
+    shutdown = None
+    if args.target == 'flask':
+        call, shutdown = flask_target()
+    elif args.target == 'netlify':
+        call, shutdown = netlify_target()
+    elif args.target == 'vercel':
+        call, shutdown = vercel_target()
+    else:
+        call = http_target(args.url)
+    pid = args.server_pid if args.target == 'url' and args.server_pid else os.getpid()
+
+    for i in range(args.warmup):
+        call(corpus[i % len(corpus)])
+
+    levels = []
+    for concurrency in (int(c) for c in args.concurrency.split(',')):
+        levels.append(replay(call, corpus, concurrency, args.requests, pid))
+    if shutdown is not None:
+        shutdown()
+
+    report = {
+        'timestamp': datetime.now().isoformat() + 'Z',
+        'git_commit': git_commit(),
+        'target': args.target,
+        'url': args.url if args.target == 'url' else None,
+        'host': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'max_rss_mb_self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        },
+        'config': {**{name: os.environ[name] for name in CONFIG_VARS if name in os.environ},
+                   'with_cache': args.with_cache},
+        'corpus': {
+            'directory': os.path.relpath(args.corpus, ROOT),
+            'entries': len(corpus),
+            'sizes': sorted({entry['size'] for entry in corpus}),
+            'formats': sorted({entry['format'] for entry in corpus}),
+            'modes': sorted({entry['mode'] for entry in corpus})
+        },
+        'measured_pid': pid,
+        'levels': levels
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cold-vs-warm latency report for the Netlify analyze function
+Each cold sample runs in a fresh interpreter, so import + prewarm cost is measured for real
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FUNCTION_PATH = os.path.join(ROOT, 'netlify', 'functions', 'analyze.py')
+
+# Runs inside a fresh interpreter: import the function, then invoke it cold and warm
+CHILD_SCRIPT = r'''
+import importlib.util, json, sys, time
+sys.path.insert(0, sys.argv[1])
+from sample_images import make_image_bytes, to_data_url
+
+event = {'httpMethod': 'POST', 'body': json.dumps({'image': to_data_url(make_image_bytes())})}
+
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('netlify_analyze', sys.argv[2])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+import_ms = (time.perf_counter() - start) * 1000
+
+timings = []
+for _ in range(int(sys.argv[3]) + 1):
+    start = time.perf_counter()
+    response = module.handler(event, None)
+    timings.append((time.perf_counter() - start) * 1000)
+
+body = json.loads(response['body'])
+print(json.dumps({
+    'import_ms': import_ms,
+    'cold_ms': timings[0],
+    'warm_ms': timings[1:],
+    'prewarm_ms': module.registry.prewarm_ms,
+    'backend_available': module.BACKEND_AVAILABLE,
+    'model_name': body.get('model_name')
+}))
+'''
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    """Latency summary in milliseconds"""
+    return {
+        'n': len(values),
+        'mean_ms': round(statistics.mean(values), 1),
+        'p50_ms': round(percentile(values, 50), 1),
+        'p95_ms': round(percentile(values, 95), 1),
+        'max_ms': round(max(values), 1)
+    }
+
+
+def run_sample(warm_requests, prewarm):
+    """One cold container: fresh interpreter, one cold and N warm invocations"""
+    env = dict(os.environ, PREWARM_MODEL='1' if prewarm else '0')
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, os.path.dirname(os.path.abspath(__file__)),
+         FUNCTION_PATH, str(warm_requests)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cold-samples', type=int, default=5, help='fresh containers to start')
+    parser.add_argument('--warm-requests', type=int, default=20, help='warm invocations per container')
+    parser.add_argument('--no-prewarm', action='store_true', help='disable the import-time prewarm hook')
+    args = parser.parse_args()
+
+    samples = [run_sample(args.warm_requests, not args.no_prewarm) for _ in range(args.cold_samples)]
+
+    import_ms = [s['import_ms'] for s in samples]
+    cold_ms = [s['cold_ms'] for s in samples]
+    warm_ms = [ms for s in samples for ms in s['warm_ms']]
+
+    report = {
+        'function': 'netlify/functions/analyze.py',
+        'prewarm': not args.no_prewarm,
+        'backend_available': samples[0]['backend_available'],
+        'model_name': samples[0]['model_name'],
+        'import': summarize(import_ms),
+        'cold_first_request': summarize(cold_ms),
+        'cold_total': summarize([i + c for i, c in zip(import_ms, cold_ms)]),
+        'warm_request': summarize(warm_ms) if warm_ms else None
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Per-call latency of model.predict vs the compiled inference path (inference.CompiledPredictor)
+Also checks that batch sizes 1..N share a single trace
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+import numpy as np
+
+
+def time_calls(fn, batch, repeats):
+    """Latency samples in milliseconds (one untimed call first)"""
+    fn(batch)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(batch)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples, batch_size):
+    ordered = sorted(samples)
+    return {
+        'mean_ms': round(statistics.mean(samples), 2),
+        'p50_ms': round(ordered[len(ordered) // 2], 2),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        'per_image_ms': round(statistics.mean(samples) / batch_size, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default=os.path.join(ROOT, 'models', 'optimized_cookware_acc_0.2898.keras'))
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16', help='comma-separated batch sizes')
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    from inference import CompiledPredictor
+
+    model = tf.keras.models.load_model(args.model)
+    predictor = CompiledPredictor(model)
+
+    results = []
+    for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+        batch = np.random.rand(batch_size, 224, 224, 3).astype(np.float32)
+
+        keras_predict = summarize(time_calls(lambda x: model.predict(x, verbose=0), batch, args.repeats), batch_size)
+        compiled = summarize(time_calls(predictor, batch, args.repeats), batch_size)
+
+        # Both paths must agree before the speedup means anything
+        max_abs_diff = float(np.max(np.abs(model.predict(batch, verbose=0) - predictor(batch))))
+
+        results.append({
+            'batch_size': batch_size,
+            'model_predict': keras_predict,
+            'compiled': compiled,
+            'speedup': round(keras_predict['mean_ms'] / compiled['mean_ms'], 2),
+            'max_abs_diff': max_abs_diff
+        })
+
+    print(json.dumps({
+        'model': os.path.basename(args.model),
+        'tensorflow': tf.__version__,
+        'repeats': args.repeats,
+        'compiled_trace_count': predictor.trace_count,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Bytes allocated per request by image preprocessing, before and after the float32 buffer
+'legacy' is the original np.array(image) / 255.0 + expand_dims pipeline;
+'buffered' is preprocessing.preprocess_image writing into the reusable input buffer
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+import numpy as np
+from PIL import Image
+
+import preprocessing
+from sample_images import make_image_bytes, to_data_url
+
+
+def legacy_preprocess(image_data):
+    """The pre-buffer pipeline, kept here as the baseline"""
+    if 'data:image' in image_data:
+        image_data = image_data.split(',')[1]
+    image = Image.open(io.BytesIO(base64.b64decode(image_data)))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image = image.resize((224, 224))
+    image_array = np.array(image) / 255.0
+    return np.expand_dims(image_array, axis=0)
+
+
+def measure(fn, image_data, repeats):
+    """Peak traced bytes and mean latency per call (one untimed call warms the buffer)"""
+    fn(image_data)
+    peaks, timings = [], []
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn(image_data)
+        timings.append((time.perf_counter() - start) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+    return {
+        'output_dtype': str(result.dtype),
+        'output_bytes': int(result.nbytes),
+        'peak_bytes_allocated': int(np.median(peaks)),
+        'mean_ms': round(float(np.mean(timings)), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='640x480,1280x960,4000x3000')
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes.split(','):
+        width, height = (int(v) for v in size.split('x'))
+        image_data = to_data_url(make_image_bytes(width, height))
+        legacy = measure(legacy_preprocess, image_data, args.repeats)
+        buffered = measure(preprocessing.preprocess_image, image_data, args.repeats)
+        results.append({
+            'size': size,
+            'legacy': legacy,
+            'buffered': buffered,
+            'bytes_saved_per_request': legacy['peak_bytes_allocated'] - buffered['peak_bytes_allocated']
+        })
+
+    print(json.dumps({'repeats': args.repeats, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
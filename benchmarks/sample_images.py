@@ -0,0 +1,49 @@
+"""
+Synthetic cookware-like test images for the benchmark scripts
+Generates pan-shaped images in memory so benchmarks run without a dataset
+"""
+
+import base64
+import io
+
+from PIL import Image, ImageDraw, ImageFilter
+
+
+def make_image(width=1024, height=768, seed=0):
+    """Draw a dark pan with a lighter rim and a few scratch marks"""
+    image = Image.new('RGB', (width, height), (200 - seed % 40, 190, 180))
+    draw = ImageDraw.Draw(image)
+
+    # Pan body and rim
+    margin = min(width, height) // 8
+    box = (margin, margin, width - margin, height - margin)
+    draw.ellipse(box, fill=(40 + seed % 30, 40, 45), outline=(150, 150, 155), width=max(2, margin // 6))
+
+    # Scratches - position depends on the seed so images differ
+    for i in range(6 + seed % 5):
+        x0 = margin * 2 + (i * 97 + seed * 31) % max(1, width - margin * 4)
+        y0 = margin * 2 + (i * 53 + seed * 17) % max(1, height - margin * 4)
+        draw.line((x0, y0, x0 + width // 10, y0 + height // 14), fill=(170, 160, 150), width=2)
+
+    return image.filter(ImageFilter.GaussianBlur(radius=1))
+
+
+def encode_image(image, fmt='JPEG', quality=90):
+    """Encode a PIL image to bytes in the given format"""
+    buffer = io.BytesIO()
+    if fmt == 'JPEG':
+        image.save(buffer, format=fmt, quality=quality)
+    else:
+        image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def make_image_bytes(width=1024, height=768, fmt='JPEG', seed=0):
+    """Encoded test image bytes"""
+    return encode_image(make_image(width, height, seed), fmt)
+
+
+def to_data_url(image_bytes, fmt='JPEG'):
+    """Wrap image bytes the way public/script.js sends them (readAsDataURL)"""
+    mime = 'image/' + fmt.lower()
+    return f"data:{mime};base64,{base64.b64encode(image_bytes).decode('ascii')}"
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Workers x intra-op threads sweep for the gunicorn deployment
+Starts gunicorn once per topology whose workers x intra-op threads fills this host's cores
+(optionally twice them, to measure oversubscription), replays the load-test corpus against
+it and reports throughput and p99 latency per setting, then recommends the best one for each.
+
+    python benchmarks/topology_sweep.py --concurrency 4,16 --requests 200
+    python benchmarks/topology_sweep.py --oversubscribe --affinity 0,1 --output results/topology.json
+Serve the recommendation with the env lines printed at the end (or CPU_PROFILE=...)
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+import cpu_topology
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(url, process, timeout):
+    """True once /api/health answers 200 (the model is loaded before gunicorn forks)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url + '/api/health', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_setting(workers, intra, threads, affinity, args):
+    """Load-test levels for one topology, or None when the server didn't come up"""
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, PORT=str(port), GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads),
+               TF_NUM_INTRAOP_THREADS=str(intra), TF_NUM_INTEROP_THREADS='1' if intra == 1 else '2',
+               OMP_NUM_THREADS=str(intra), TFLITE_NUM_THREADS=str(intra), ORT_INTRA_OP_THREADS=str(intra),
+               CPU_AFFINITY=str(affinity), MODEL_RELOAD='0',
+               # The corpus repeats - rank decode and inference speed, not cache hits
+               RESULT_CACHE='0', PHASH_CACHE='0')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_healthy(url, server, args.startup_timeout):
+            print("  ❌ server did not become healthy")
+            return None
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            output = f.name
+        subprocess.run([sys.executable, os.path.join('benchmarks', 'load_test.py'), '--target', 'url', '--url', url,
+                        '--server-pid', str(server.pid), '--concurrency', args.concurrency,
+                        '--requests', str(args.requests), '--corpus', args.corpus, '--output', output],
+                       env=env, stdout=subprocess.DEVNULL, check=True)
+        with open(output) as f:
+            levels = json.load(f)['levels']
+        os.remove(output)
+        return levels
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def summarize(levels):
+    """Best throughput and worst p99 across the concurrency levels"""
+    p99s = [level['latency_ms']['p99'] for level in levels if level['latency_ms']['p99'] is not None]
+    return {
+        'throughput_rps': max(level['throughput_rps'] for level in levels),
+        'p99_ms': max(p99s) if p99s else None,
+        'errors': sum(level['errors'] for level in levels)
+    }
+
+
+def env_lines(result):
+    return {
+        'GUNICORN_WORKERS': str(result['workers']),
+        'GUNICORN_THREADS': str(result['threads']),
+        'TF_NUM_INTRAOP_THREADS': str(result['intra_op_threads']),
+        'CPU_AFFINITY': str(result['affinity'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cores', type=int, help='cores to plan for (default: detected)')
+    parser.add_argument('--oversubscribe', action='store_true', help='also try workers x intra-op = 2 x cores')
+    parser.add_argument('--threads', default='1', help='gunicorn threads per worker to try, e.g. 1,4')
+    parser.add_argument('--affinity', default='0', help='CPU_AFFINITY values to try, e.g. 0,1')
+    parser.add_argument('--concurrency', default='4,16')
+    parser.add_argument('--requests', type=int, default=100, help='requests per concurrency level')
+    parser.add_argument('--corpus', default=os.path.join('benchmarks', 'corpus'))
+    parser.add_argument('--startup-timeout', type=float, default=180)
+    parser.add_argument('--output', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    cores = args.cores or cpu_topology.available_cores()
+    print(f"🖥️  {cores} core(s) (cgroup limit {cpu_topology.cgroup_cpu_limit()}), "
+          f"planned: {cpu_topology.plan_topology(cores)}")
+
+    results = []
+    for workers, intra in cpu_topology.candidate_topologies(cores, args.oversubscribe):
+        for threads in (int(t) for t in args.threads.split(',')):
+            for affinity in (int(a) for a in args.affinity.split(',')):
+                print(f"⏱️  {workers} worker(s) x {intra} intra-op thread(s), {threads} thread(s), affinity {affinity}")
+                levels = run_setting(workers, intra, threads, affinity, args)
+                if levels is None:
+                    continue
+                result = {'workers': workers, 'intra_op_threads': intra, 'threads': threads,
+                          'affinity': affinity, **summarize(levels), 'levels': levels}
+                results.append(result)
+                print(f"  {result['throughput_rps']} req/s, p99 {result['p99_ms']} ms, {result['errors']} error(s)")
+
+    if not results:
+        print("❌ No topology produced results")
+        return 1
+    clean = [r for r in results if not r['errors']] or results
+    best_throughput = max(clean, key=lambda r: r['throughput_rps'])
+    best_latency = min((r for r in clean if r['p99_ms'] is not None), key=lambda r: r['p99_ms'], default=best_throughput)
+
+    report = {
+        'cores': cores,
+        'cgroup_cpu_limit': cpu_topology.cgroup_cpu_limit(),
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'results': results,
+        'best_throughput': env_lines(best_throughput),
+        'best_p99': env_lines(best_latency)
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(report, indent=2) + '\n')
+        print(f"📄 Report written to {args.output}")
+
+    for title, result in (('Best throughput', best_throughput), ('Best p99 latency', best_latency)):
+        print(f"\n✅ {title}: {result['throughput_rps']} req/s, p99 {result['p99_ms']} ms")
+        for name, value in env_lines(result).items():
+            print(f"  {name}={value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
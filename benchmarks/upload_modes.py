@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Upload mode benchmark for /api/analyze: JSON base64 vs multipart/form-data vs raw image body
+Reports bytes on the wire and server CPU time per request, using the Flask app in-process
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.chdir(ROOT)
+
+from sample_images import make_image_bytes, to_data_url
+
+BOUNDARY = 'cookwareBenchmarkBoundary'
+
+
+def build_requests(image_bytes):
+    """(content_type, body) per upload mode, built up front so only the server side is timed"""
+    multipart = (
+        f'--{BOUNDARY}\r\n'
+        'Content-Disposition: form-data; name="image"; filename="pan.jpg"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + image_bytes + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    return {
+        'json': ('application/json', json.dumps({'image': to_data_url(image_bytes)}).encode()),
+        'multipart': (f'multipart/form-data; boundary={BOUNDARY}', multipart),
+        'raw': ('image/jpeg', image_bytes)
+    }
+
+
+def measure(client, content_type, body, repeats):
+    """Mean CPU and wall time per request in ms"""
+    client.post('/api/analyze', data=body, content_type=content_type)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(repeats):
+        response = client.post('/api/analyze', data=body, content_type=content_type)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return ((time.process_time() - cpu_start) * 1000 / repeats,
+            (time.perf_counter() - wall_start) * 1000 / repeats,
+            response.get_json().get('upload_mode'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1280x960,4032x3024')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    # Import-time model preloading would only add noise here
+    os.environ.setdefault('PRELOAD_MODEL', '0')
+    # The same image is posted every time - keep the caches out of the measurement
+    os.environ['RESULT_CACHE'] = '0'
+    os.environ['PHASH_CACHE'] = '0'
+    from app import app
+    client = app.test_client()
+
+    results = []
+    for size in args.sizes.split(','):
+        width, height = (int(v) for v in size.split('x'))
+        image_bytes = make_image_bytes(width, height)
+        for mode, (content_type, body) in build_requests(image_bytes).items():
+            cpu_ms, wall_ms, served_mode = measure(client, content_type, body, args.repeats)
+            results.append({
+                'size': size,
+                'mode': mode,
+                'served_as': served_mode,
+                'image_bytes': len(image_bytes),
+                'wire_bytes': len(body),
+                'overhead_pct': round((len(body) / len(image_bytes) - 1) * 100, 1),
+                'server_cpu_ms': round(cpu_ms, 2),
+                'wall_ms': round(wall_ms, 2)
+            })
+
+    print(json.dumps({'repeats': args.repeats, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Threshold picker for the confidence-gated model cascade
+Runs every cascade stage once over a labelled image set, then sweeps the gate thresholds
+offline and picks the cheapest setting (expected ms per image) that still meets a target
+accuracy - or the most accurate one within a compute budget.
+
+Usage:
+    python cascade-thresholds.py --samples-dir data/val                      # int8 TFLite -> Keras
+    python cascade-thresholds.py --samples-dir data/val --target-accuracy 0.70
+    python cascade-thresholds.py --samples-dir data/val --max-cost 0.4       # <= 40% of Keras-only cost
+    python cascade-thresholds.py --samples-dir data/val \\
+        --models models/proven_cookware_classifier_acc_0.4034.keras,models/optimized_cookware_acc_0.2898.keras
+Images laid out as <dir>/<class>/*.jpg are scored against their labels; a flat directory
+is scored by agreement with the final (heaviest) model instead.
+Serve the result with CASCADE=1 CASCADE_MODELS=... CASCADE_THRESHOLDS=... (printed at the end)
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import inference
+import preprocessing
+
+CLASS_NAMES = ['minor', 'moderate', 'new', 'severe']
+DEFAULT_FINAL = os.path.join('models', 'optimized_cookware_acc_0.2898.keras')
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def load_samples(samples_dir, limit):
+    """(images, labels or None) preprocessed exactly like the analyzer does"""
+    root = Path(samples_dir)
+    labelled = [(label, root / name) for label, name in enumerate(CLASS_NAMES) if (root / name).is_dir()]
+    sources = labelled or [(None, root)]
+
+    buffer = preprocessing.InputBuffer(max_batch=1)
+    images, labels = [], []
+    for label, directory in sources:
+        paths = [p for p in sorted(directory.iterdir()) if p.suffix.lower() in IMAGE_SUFFIXES][:limit]
+        for path in paths:
+            try:
+                buffer.write(0, preprocessing.load_image(path.read_bytes()))
+            except Exception as e:
+                print(f"⚠️  Skipping {path}: {e}")
+                continue
+            images.append(buffer.array[0].copy())
+            labels.append(label)
+    return np.stack(images), (np.array(labels) if labelled else None)
+
+
+def run_stage(path, images, batch_size):
+    """Probabilities for every image plus mean latency per image in ms"""
+    model = inference.load_model_file(path)
+    inference.predict(model, images[:batch_size])  # trace / allocate outside the timed loop
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        outputs.append(np.asarray(inference.predict(model, images[i:i + batch_size]), dtype=np.float32))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return np.concatenate(outputs, axis=0), elapsed_ms / len(images)
+
+
+def evaluate(probabilities, costs, thresholds, labels):
+    """Accuracy, expected ms per image and share answered per stage for one threshold setting"""
+    count = len(labels)
+    answer = np.empty(count, dtype=np.int64)
+    pending = np.ones(count, dtype=bool)
+    reached = []
+    answered = []
+    for stage, probs in enumerate(probabilities):
+        reached.append(pending.mean())
+        if stage < len(thresholds):
+            confident = pending & (probs.max(axis=1) >= thresholds[stage])
+        else:
+            confident = pending
+        answer[confident] = probs[confident].argmax(axis=1)
+        answered.append(confident.mean())
+        pending &= ~confident
+    return {
+        'accuracy': float(np.mean(answer == labels)),
+        'cost_ms': float(sum(share * cost for share, cost in zip(reached, costs))),
+        'answered': [round(float(a), 4) for a in answered]
+    }
+
+
+def sweep(probabilities, costs, labels, step):
+    """Every threshold combination on the grid, cheapest first"""
+    grid = np.round(np.arange(0.30, 1.0 + 1e-9, step), 4)
+    results = []
+    for thresholds in itertools.product(grid, repeat=len(probabilities) - 1):
+        result = evaluate(probabilities, costs, thresholds, labels)
+        result['thresholds'] = [float(t) for t in thresholds]
+        results.append(result)
+    results.sort(key=lambda r: (r['cost_ms'], -r['accuracy']))
+    return results
+
+
+def pareto_front(results):
+    """Settings no other setting beats on both cost and accuracy"""
+    front, best = [], -1.0
+    for result in results:  # already sorted by cost
+        if result['accuracy'] > best:
+            front.append(result)
+            best = result['accuracy']
+    return front
+
+
+def rounded(result):
+    return {
+        'thresholds': result['thresholds'],
+        'accuracy': round(result['accuracy'], 4),
+        'cost_ms_per_image': round(result['cost_ms'], 2),
+        'answered_by_stage': result['answered']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pick confidence thresholds for the model cascade')
+    parser.add_argument('--models', default=f"{inference.tflite_path(DEFAULT_FINAL, 'int8')},{DEFAULT_FINAL}",
+                        help='comma-separated model files, cheapest first; the last is the final stage')
+    parser.add_argument('--samples-dir', required=True,
+                        help='labelled images as <dir>/<class>/*.jpg (or a flat dir: agreement with the final model)')
+    parser.add_argument('--samples', type=int, default=200, help='images per class (or in total for a flat dir)')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--target-accuracy', type=float,
+                        help='minimum accuracy (default: final model accuracy minus --tolerance)')
+    parser.add_argument('--tolerance', type=float, default=0.01)
+    parser.add_argument('--max-cost', type=float,
+                        help='compute budget as a fraction of final-model-only cost; maximizes accuracy within it')
+    parser.add_argument('--step', type=float, help='threshold grid step (default 0.01 for one gate, 0.05 for more)')
+    parser.add_argument('--output', default=os.path.join('models', 'cascade_report.json'))
+    args = parser.parse_args()
+
+    paths = [p.strip() for p in args.models.split(',') if p.strip()]
+    if len(paths) < 2:
+        print("❌ A cascade needs at least two models")
+        return 1
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ Model files not found: {missing} (convert-tflite.py creates the .tflite variants)")
+        return 1
+
+    images, labels = load_samples(args.samples_dir, args.samples)
+    print(f"🧪 {len(images)} images ({'labelled' if labels is not None else 'unlabelled - agreement with final model'})")
+
+    probabilities, costs, stages = [], [], []
+    for path in paths:
+        probs, cost = run_stage(path, images, args.batch_size)
+        probabilities.append(probs)
+        costs.append(cost)
+        print(f"  ⏱️  {os.path.basename(path)}: {cost:.2f} ms/image")
+
+    labelled = labels is not None
+    if not labelled:
+        labels = probabilities[-1].argmax(axis=1)
+    for path, probs, cost in zip(paths, probabilities, costs):
+        stages.append({
+            'model': path,
+            'accuracy': round(float(np.mean(probs.argmax(axis=1) == labels)), 4),
+            'ms_per_image': round(cost, 2)
+        })
+
+    final_accuracy = float(np.mean(probabilities[-1].argmax(axis=1) == labels))
+    final_cost = costs[-1]
+    step = args.step or (0.01 if len(paths) == 2 else 0.05)
+    results = sweep(probabilities, costs, labels, step)
+
+    if args.max_cost is not None:
+        budget = args.max_cost * final_cost
+        eligible = [r for r in results if r['cost_ms'] <= budget]
+        chosen = max(eligible, key=lambda r: (r['accuracy'], -r['cost_ms'])) if eligible else results[0]
+        goal = {'max_cost_ms_per_image': round(budget, 2)}
+    else:
+        target = args.target_accuracy if args.target_accuracy is not None else final_accuracy - args.tolerance
+        eligible = [r for r in results if r['accuracy'] >= target]
+        chosen = eligible[0] if eligible else max(results, key=lambda r: r['accuracy'])
+        goal = {'target_accuracy': round(target, 4)}
+    if not eligible:
+        print("⚠️  No threshold setting meets the goal - reporting the closest one")
+
+    env = {
+        'CASCADE': '1',
+        'CASCADE_MODELS': ','.join(paths[:-1]),
+        'CASCADE_THRESHOLDS': ','.join(f'{t:g}' for t in chosen['thresholds'])
+    }
+    report = {
+        'samples': len(images),
+        'labelled': labelled,
+        'stages': stages,
+        'goal': goal,
+        'goal_met': bool(eligible),
+        'chosen': rounded(chosen),
+        'savings_vs_final_only': round(1 - chosen['cost_ms'] / final_cost, 4) if final_cost else None,
+        'pareto_front': [rounded(r) for r in pareto_front(results)],
+        'env': env
+    }
+
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"\n✅ Thresholds {chosen['thresholds']}: accuracy {chosen['accuracy']:.4f} "
+          f"(final model alone {final_accuracy:.4f}), {chosen['cost_ms']:.2f} ms/image "
+          f"vs {final_cost:.2f} ms/image, stage shares {chosen['answered']}")
+    print(f"📄 Report written to {args.output}")
+    print("\nServe it with:")
+    for name, value in env.items():
+        print(f"  {name}={value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
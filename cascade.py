@@ -0,0 +1,154 @@
+"""
+Confidence-gated model cascade
+A cheap model (the int8 TFLite variant by default, or a lighter fallback classifier)
+answers first; only images whose top-class probability is below that stage's threshold
+go on to the next, heavier model - ending with the full EfficientNetV2-B0 model.
+Pick thresholds with cascade-thresholds.py.
+"""
+
+import os
+import threading
+import logging
+
+import numpy as np
+
+import inference
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCascade:
+    """Stages of (name, model), cheapest first, with one confidence threshold per gate"""
+
+    def __init__(self, stages, thresholds):
+        if len(stages) < 2:
+            raise ValueError('A cascade needs at least two stages')
+        if len(thresholds) != len(stages) - 1:
+            raise ValueError(f'{len(stages)} stages need {len(stages) - 1} threshold(s), got {len(thresholds)}')
+        self.stages = list(stages)
+        self.thresholds = [float(t) for t in thresholds]
+        self.answered = [0] * len(self.stages)
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        return [name for name, _ in self.stages]
+
+    def identity(self):
+        """Changes with the stage models or thresholds - part of the result cache key"""
+        gates = ','.join(f'{t:g}' for t in self.thresholds)
+        return f"cascade:{'>'.join(self.names)}@{gates}"
+
+    def predict(self, batch):
+        """(predictions (N, C), answering stage index per row).
+
+        Every row starts at the first stage; rows below a stage's threshold are
+        re-run on the next stage only, so confident images never touch the heavy model.
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        size = len(batch)
+        predictions = None
+        stage_of = np.zeros(size, dtype=np.int64)
+        pending = np.arange(size)
+        last = len(self.stages) - 1
+
+        for index, (_, model) in enumerate(self.stages):
+            inputs = batch if len(pending) == size else batch[pending]
+            output = np.asarray(inference.predict(model, inputs), dtype=np.float32)
+            if predictions is None:
+                predictions = np.empty((size, output.shape[1]), dtype=np.float32)
+            predictions[pending] = output
+            stage_of[pending] = index
+            if index == last:
+                break
+            pending = pending[output.max(axis=1) < self.thresholds[index]]
+            if not len(pending):
+                break
+
+        counts = np.bincount(stage_of, minlength=len(self.stages))
+        with self._lock:
+            for index, count in enumerate(counts):
+                self.answered[index] += int(count)
+        for (name, _), count in zip(self.stages, counts):
+            if count:
+                metrics.cascade_answers(name, int(count))
+        return predictions, stage_of
+
+    def stage_info(self, index):
+        """Response metadata for a row answered by stage index"""
+        index = int(index)
+        return {
+            'stage': self.stages[index][0],
+            'stage_index': index,
+            'stages': len(self.stages),
+            'escalated': index > 0,
+            'threshold': self.thresholds[index] if index < len(self.thresholds) else None
+        }
+
+    def warm_up(self, batch):
+        """One forward pass through every stage, so no stage is cold on its first escalation"""
+        for _, model in self.stages:
+            inference.predict(model, batch)
+
+    def stats(self):
+        with self._lock:
+            answered = list(self.answered)
+        total = sum(answered)
+        return {
+            'stages': [
+                {
+                    'name': name,
+                    'threshold': self.thresholds[i] if i < len(self.thresholds) else None,
+                    'answered': answered[i],
+                    'share': round(answered[i] / total, 4) if total else 0.0
+                }
+                for i, (name, _) in enumerate(self.stages)
+            ],
+            'images': total,
+            'escalation_rate': round(1 - answered[0] / total, 4) if total else 0.0
+        }
+
+
+def cascade_config(final_model_path):
+    """Cascade settings - CASCADE=1 enables it in front of the model at final_model_path.
+
+    CASCADE_MODELS lists the cheaper stages, cheapest first (default: the int8 TFLite
+    variant of the final model); CASCADE_THRESHOLDS has one threshold per listed stage.
+    """
+    default_stage = inference.tflite_path(final_model_path, 'int8') if final_model_path else ''
+    models = [path.strip() for path in os.environ.get('CASCADE_MODELS', default_stage).split(',') if path.strip()]
+    thresholds = [float(t) for t in os.environ.get('CASCADE_THRESHOLDS', '0.8').split(',') if t.strip()]
+    if len(thresholds) == 1 and len(models) > 1:
+        thresholds = thresholds * len(models)
+    return {
+        'enabled': os.environ.get('CASCADE', '0') == '1',
+        'models': models,
+        'thresholds': thresholds
+    }
+
+
+def build_cascade(final_name, final_model, config):
+    """ModelCascade ending with the already-loaded final model, or None if no cheaper stage loads"""
+    if len(config['thresholds']) != len(config['models']):
+        logger.error("CASCADE_THRESHOLDS needs one value per CASCADE_MODELS entry - cascade disabled")
+        return None
+
+    stages, thresholds = [], []
+    for path, threshold in zip(config['models'], config['thresholds']):
+        if not os.path.exists(path):
+            logger.warning(f"Cascade stage {path} not found - skipping it")
+            continue
+        try:
+            stages.append((os.path.basename(path), inference.load_model_file(path)))
+            thresholds.append(threshold)
+        except Exception as e:
+            logger.error(f"Cascade stage {path} failed to load: {str(e)}")
+
+    if not stages:
+        logger.warning("No cascade stage could be loaded - serving the final model only")
+        return None
+    stages.append((final_name, final_model))
+    cascade = ModelCascade(stages, thresholds)
+    logger.info(f"Model cascade: {' -> '.join(cascade.names)} (thresholds {cascade.thresholds})")
+    return cascade
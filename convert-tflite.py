@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+TFLite converter for the cookware classifiers
+Converts every models/*.keras file to float32, dynamic-range int8 and float16 .tflite
+variants, then checks accuracy parity, latency and size of each variant against Keras
+
+Usage:
+    python convert-tflite.py                              # convert all models + parity on synthetic inputs
+    python convert-tflite.py --samples-dir data/val       # parity on labelled images (data/val/<class>/*.jpg)
+    python convert-tflite.py --variants int8 --skip-parity
+Serve a variant with INFERENCE_BACKEND=tflite TFLITE_VARIANT=<variant>
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference import TFLITE_VARIANTS, CompiledPredictor, TFLitePredictor, tflite_path
+
+CLASS_NAMES = ['minor', 'moderate', 'new', 'severe']
+
+
+def convert(model, variant):
+    """Convert a loaded Keras model to a TFLite flatbuffer"""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == 'int8':
+        # Dynamic-range quantization: int8 weights, float32 activations and I/O
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variant == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    return converter.convert()
+
+
+def load_samples(samples_dir, limit):
+    """Labelled images from <dir>/<class>/*, preprocessed like the analyzer does"""
+    images, labels = [], []
+    for label, class_name in enumerate(CLASS_NAMES):
+        class_dir = Path(samples_dir) / class_name
+        if not class_dir.is_dir():
+            continue
+        for path in sorted(class_dir.iterdir())[:limit]:
+            try:
+                image = Image.open(path).convert('RGB').resize((224, 224))
+            except Exception as e:
+                print(f"⚠️  Skipping {path}: {e}")
+                continue
+            images.append(np.asarray(image, dtype=np.float32) / 255.0)
+            labels.append(label)
+    return np.stack(images), np.array(labels)
+
+
+def synthetic_samples(count, seed=0):
+    """Random inputs - only checks agreement with Keras, not real accuracy"""
+    rng = np.random.default_rng(seed)
+    return rng.random((count, 224, 224, 3), dtype=np.float32), None
+
+
+def run_batches(predict, images, batch_size=1):
+    """Predictions for all images plus mean per-image latency in ms"""
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        outputs.append(predict(images[i:i + batch_size]))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return np.concatenate(outputs, axis=0), elapsed_ms / len(images)
+
+
+def parity_report(reference, reference_ms, candidate, candidate_ms, labels):
+    """Agreement between a TFLite variant and the Keras reference"""
+    report = {
+        'top1_agreement': round(float(np.mean(reference.argmax(1) == candidate.argmax(1))), 4),
+        'max_abs_prob_diff': round(float(np.max(np.abs(reference - candidate))), 6),
+        'latency_ms_per_image': round(candidate_ms, 2),
+        'speedup_vs_keras': round(reference_ms / candidate_ms, 2) if candidate_ms else None
+    }
+    if labels is not None:
+        report['accuracy'] = round(float(np.mean(candidate.argmax(1) == labels)), 4)
+        report['accuracy_delta'] = round(float(np.mean(candidate.argmax(1) == labels) -
+                                               np.mean(reference.argmax(1) == labels)), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert cookware models to TFLite')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--variants', default=','.join(TFLITE_VARIANTS))
+    parser.add_argument('--samples-dir', help='labelled images laid out as <dir>/<class>/*.jpg')
+    parser.add_argument('--samples', type=int, default=32, help='images per class (or synthetic total)')
+    parser.add_argument('--skip-parity', action='store_true')
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    variants = [v.strip() for v in args.variants.split(',') if v.strip()]
+    unknown = [v for v in variants if v not in TFLITE_VARIANTS]
+    if unknown:
+        print(f"❌ Unknown variants: {unknown} (choose from {', '.join(TFLITE_VARIANTS)})")
+        return 1
+
+    keras_files = sorted(Path(args.models_dir).glob('*.keras'))
+    if not keras_files:
+        print(f"❌ No .keras model files found in {args.models_dir}")
+        return 1
+
+    if not args.skip_parity:
+        if args.samples_dir:
+            images, labels = load_samples(args.samples_dir, args.samples)
+        else:
+            images, labels = synthetic_samples(args.samples)
+        print(f"🧪 Parity set: {len(images)} images ({'labelled' if labels is not None else 'synthetic'})")
+
+    report = {'tensorflow': tf.__version__, 'models': {}}
+    for keras_file in keras_files:
+        print(f"\n🔄 Converting {keras_file.name}")
+        model = tf.keras.models.load_model(keras_file)
+        entry = {'keras_size_mb': round(keras_file.stat().st_size / 1e6, 2), 'variants': {}}
+
+        if not args.skip_parity:
+            keras_predict = CompiledPredictor(model)
+            keras_predict(images[:1])  # trace outside the timed loop
+            reference, reference_ms = run_batches(keras_predict, images)
+            entry['keras_latency_ms_per_image'] = round(reference_ms, 2)
+            if labels is not None:
+                entry['keras_accuracy'] = round(float(np.mean(reference.argmax(1) == labels)), 4)
+
+        for variant in variants:
+            output_path = tflite_path(str(keras_file), variant)
+            Path(output_path).write_bytes(convert(model, variant))
+            variant_entry = {'file': os.path.basename(output_path),
+                             'size_mb': round(os.path.getsize(output_path) / 1e6, 2)}
+
+            if not args.skip_parity:
+                predictor = TFLitePredictor(output_path)
+                candidate, candidate_ms = run_batches(predictor, images)
+                variant_entry.update(parity_report(reference, reference_ms, candidate, candidate_ms, labels))
+
+            entry['variants'][variant] = variant_entry
+            print(f"  ✅ {variant}: {variant_entry}")
+
+        report['models'][keras_file.name] = entry
+
+    report_path = Path(args.models_dir) / 'tflite_report.json'
+    report_path.write_text(json.dumps(report, indent=2))
+    print(f"\n📄 Report written to {report_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
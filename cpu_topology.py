@@ -0,0 +1,161 @@
+"""
+CPU topology for the Cookware Analyzer
+Detects the cores this container may use (CPU affinity / cpuset, capped by a cgroup CPU
+quota) and plans gunicorn workers and threads, inference thread pools (TensorFlow intra/
+inter-op, TFLite, ONNX Runtime) and optional per-worker CPU affinity, so that workers x
+intra-op threads matches the cores instead of oversubscribing them or leaving them idle.
+Explicitly set environment variables always win over the plan.
+Stdlib only - gunicorn.conf.py imports it before the app.
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# balanced: a few workers with 2 intra-op threads each; throughput: one single-threaded
+# worker per core; latency: one worker whose forward pass uses every core
+PROFILES = ('balanced', 'throughput', 'latency')
+
+
+def cgroup_cpu_limit():
+    """CPU quota of this container in cores (cgroup v2 cpu.max or v1 CFS quota), or None"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        return int(quota) / int(period) if quota != 'max' else None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def allowed_cpus():
+    """CPU ids this process may run on"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def available_cores():
+    """Cores this process may use (respects CPU affinity, container cpusets and CPU quotas)"""
+    cores = len(allowed_cpus())
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        # A fractional quota is throttled, not rounded up - plan for the whole cores only
+        cores = min(cores, max(1, int(limit)))
+    return max(1, cores)
+
+
+def _env_int(name):
+    value = os.environ.get(name, '').strip()
+    return int(value) if value else None
+
+
+def plan_topology(cores=None, profile=None, workers=None):
+    """Workers, threads and thread-pool sizes for this host.
+
+    workers forces the worker count (e.g. 1 for a standalone process); otherwise
+    GUNICORN_WORKERS or the CPU_PROFILE plan decides it.
+    """
+    cores = cores or available_cores()
+    profile = (profile or os.environ.get('CPU_PROFILE', 'balanced')).lower()
+    if profile not in PROFILES:
+        logger.warning(f"Unknown CPU_PROFILE '{profile}', using balanced")
+        profile = 'balanced'
+
+    if profile == 'throughput':
+        planned_workers, planned_intra = cores, 1
+    elif profile == 'latency':
+        planned_workers, planned_intra = 1, cores
+    else:
+        planned_intra = 2 if cores >= 4 else 1
+        planned_workers = max(1, cores // planned_intra)
+
+    workers = workers or _env_int('GUNICORN_WORKERS')
+    if workers:
+        # Fixed worker count - share the cores between them
+        planned_intra = max(1, cores // workers)
+    else:
+        workers = planned_workers
+    intra = _env_int('TF_NUM_INTRAOP_THREADS') or planned_intra
+    inter = _env_int('TF_NUM_INTEROP_THREADS') or (1 if intra == 1 else 2)
+
+    # Extra threads only pay off when concurrent requests can share a forward pass
+    batch_size = _env_int('BATCH_MAX_SIZE') or 1
+    threads = _env_int('GUNICORN_THREADS') or (min(8, batch_size) if batch_size > 1 else 1)
+
+    return {
+        'cores': cores,
+        'cgroup_cpu_limit': cgroup_cpu_limit(),
+        'profile': profile,
+        'workers': workers,
+        'threads': threads,
+        'intra_op_threads': intra,
+        'inter_op_threads': inter,
+        'affinity': os.environ.get('CPU_AFFINITY', '0') == '1'
+    }
+
+
+def apply_thread_env(plan):
+    """Export the plan's thread-pool sizes before any inference runtime is imported"""
+    intra, inter = str(plan['intra_op_threads']), str(plan['inter_op_threads'])
+    for name, value in (('TF_NUM_INTRAOP_THREADS', intra), ('TF_NUM_INTEROP_THREADS', inter),
+                        ('OMP_NUM_THREADS', intra), ('TFLITE_NUM_THREADS', intra),
+                        ('ORT_INTRA_OP_THREADS', intra), ('ORT_INTER_OP_THREADS', inter)):
+        os.environ.setdefault(name, value)
+
+
+def configure_tensorflow(tf):
+    """Size TensorFlow's thread pools from the environment - call right after importing it"""
+    intra, inter = _env_int('TF_NUM_INTRAOP_THREADS'), _env_int('TF_NUM_INTEROP_THREADS')
+    try:
+        if intra:
+            tf.config.threading.set_intra_op_parallelism_threads(intra)
+        if inter:
+            tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError as e:
+        # Only possible before the runtime initializes; it is already running with its pools
+        logger.warning(f"TensorFlow thread pools already initialized: {e}")
+
+
+def worker_cpus(slot, plan, cpus=None):
+    """CPU ids for worker slot - consecutive, non-overlapping blocks while there are enough cores"""
+    cpus = cpus or allowed_cpus()
+    width = max(1, len(cpus) // max(1, plan['workers']))
+    start = (slot * width) % len(cpus)
+    return cpus[start:start + width]
+
+
+def pin_worker(slot, plan):
+    """Restrict this process to its slot's CPUs (CPU_AFFINITY=1); returns them, or None if unsupported"""
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    cpus = worker_cpus(slot, plan)
+    os.sched_setaffinity(0, cpus)
+    return cpus
+
+
+def current_affinity():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return None
+
+
+def candidate_topologies(cores, oversubscribe=False):
+    """(workers, intra_op_threads) pairs whose product fills the cores (or twice them) - for the sweep"""
+    totals = (cores, 2 * cores) if oversubscribe else (cores,)
+    pairs = []
+    for total in totals:
+        for workers in range(1, total + 1):
+            if total % workers == 0:
+                pairs.append((workers, total // workers))
+    return sorted(set(pairs))
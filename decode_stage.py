@@ -0,0 +1,239 @@
+"""
+Decode stage of the analysis pipeline
+Image decode and resize run on a pool sized to the available cores - threads (Pillow
+releases the GIL while decoding) or separate processes (no GIL contention with
+inference at all) - and hand ready float32 tensors to the inference stage. An admission
+limit on images between "decode started" and "inference finished" gives backpressure:
+when inference falls behind, new requests wait instead of piling up decoded tensors.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+import metrics
+import preprocessing
+from batching import batching_config
+from cpu_topology import available_cores
+
+logger = logging.getLogger(__name__)
+
+MODES = ('thread', 'process')
+
+
+class StageBusy(Exception):
+    """Raised when admission to the pipeline times out"""
+
+
+def decode_pixels(source, image_size, with_hash=False):
+    """Encoded bytes -> (uint8 (H, W, 3) pixels, dHash or None) - runs inside the pool.
+
+    Returning uint8 keeps the process-pool transfer at a quarter of the float32 size;
+    scaling to float32 happens when the pixels are written into the input buffer.
+    """
+    image = preprocessing.load_image(source, image_size)
+    image_hash = None
+    if with_hash:
+        from phash_index import dhash
+        image_hash = dhash(image)
+    return np.asarray(image, dtype=np.uint8), image_hash
+
+
+class StageTimings:
+    """Recent per-stage durations - shows whether decode or inference is the bottleneck"""
+
+    def __init__(self, window=1000):
+        self._samples = {}
+        self._totals = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, stage, ms):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self._window)
+                self._totals[stage] = [0, 0.0]
+            samples.append(ms)
+            self._totals[stage][0] += 1
+            self._totals[stage][1] += ms
+
+    def stats(self):
+        with self._lock:
+            stages = {}
+            for stage, samples in self._samples.items():
+                ordered = sorted(samples)
+                count, total = self._totals[stage]
+                stages[stage] = {
+                    'count': count,
+                    'mean_ms': round(total / count, 2) if count else 0.0,
+                    'p50_ms': metrics.percentile(ordered, 50),
+                    'p99_ms': metrics.percentile(ordered, 99)
+                }
+        measured = [stage for stage in ('decode', 'inference') if stage in stages]
+        busiest = max(measured, key=lambda stage: stages[stage]['mean_ms']) if measured else None
+        return {'stages': stages, 'bottleneck': busiest}
+
+
+class DecodeStage:
+    """Pool-backed image decoding with admission control in front of inference"""
+
+    def __init__(self, mode='thread', workers=None, max_in_flight=None, admit_timeout=30.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown decode mode {mode!r} - expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.workers = max(1, int(workers or available_cores()))
+        self.max_in_flight = max(1, int(max_in_flight or 2 * self.workers))
+        self.admit_timeout = float(admit_timeout)
+        self.timings = StageTimings()
+        self._in_flight = 0
+        self._waiting = 0
+        self._queue = deque()  # waiting requests in arrival order
+        self._condition = threading.Condition()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def executor(self):
+        """Pool created on first use, so it is never started in a pre-fork gunicorn master"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.mode == 'process':
+                        # spawn: children import only preprocessing (numpy + Pillow), never the model
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                             mp_context=multiprocessing.get_context('spawn'))
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='decode')
+                    logger.info(f"Decode stage: {self.workers} {self.mode} worker(s), "
+                                f"max {self.max_in_flight} image(s) in flight")
+        return self._executor
+
+    @contextmanager
+    def admit(self, images=1):
+        """Hold `images` pipeline slots from decode until inference is done - yields the wait in ms.
+
+        Blocks while the pipeline is full. Requests are admitted in arrival order, so a
+        large one is not starved by a stream of single images overtaking it; one larger
+        than the whole limit is admitted on its own once the pipeline drains. Raises
+        StageBusy on timeout.
+        """
+        images = max(1, int(images))
+        start = time.perf_counter()
+        ticket = object()
+        with self._condition:
+            self._waiting += 1
+            self._queue.append(ticket)
+            metrics.queue_changed('pipeline_waiting', 1)
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self._queue[0] is ticket and (
+                        self._in_flight == 0 or self._in_flight + images <= self.max_in_flight),
+                    timeout=self.admit_timeout
+                )
+            finally:
+                self._waiting -= 1
+                self._queue.remove(ticket)
+                metrics.queue_changed('pipeline_waiting', -1)
+                # The next waiter is now at the head - it may fit straight away
+                self._condition.notify_all()
+            if not admitted:
+                raise StageBusy(f'Pipeline full ({self._in_flight} images in flight)')
+            self._in_flight += images
+        metrics.queue_changed('pipeline_in_flight', images)
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.timings.record('queue_wait', wait_ms)
+        metrics.observe('queue_wait', wait_ms / 1000)
+        try:
+            yield wait_ms
+        finally:
+            with self._condition:
+                self._in_flight -= images
+                self._condition.notify_all()
+            metrics.queue_changed('pipeline_in_flight', -images)
+
+    def _submit(self, source, with_hash=False):
+        # File objects can't cross a process boundary, so always hand over bytes
+        return self.executor().submit(decode_pixels, preprocessing.image_bytes(source),
+                                      preprocessing.IMAGE_SIZE, with_hash)
+
+    def preprocess(self, source, with_hash=False):
+        """One image -> (float32 (1, 224, 224, 3) batch, dHash or None).
+
+        The batch is a view of this thread's reusable buffer, as with preprocess_image.
+        """
+        start = time.perf_counter()
+        pixels, image_hash = self._submit(source, with_hash).result()
+        buffer = preprocessing.thread_buffer(1)
+        buffer.write(0, pixels)
+        self.timings.record('decode', (time.perf_counter() - start) * 1000)
+        return buffer.batch(1), image_hash
+
+    def preprocess_batch(self, sources):
+        """Decode many images in parallel into one float32 (N, 224, 224, 3) tensor.
+
+        Returns (batch, indices, errors): row k of batch belongs to sources[indices[k]],
+        and errors maps the index of every image that failed to decode to its message.
+        """
+        start = time.perf_counter()
+        buffer = preprocessing.InputBuffer(max_batch=max(1, len(sources)))
+        futures = {}
+        errors = {}
+        for index, source in enumerate(sources):
+            try:
+                futures[index] = self._submit(source)
+            except Exception as e:  # e.g. invalid base64
+                errors[index] = str(e)
+
+        indices = []
+        for index, future in futures.items():
+            try:
+                buffer.write(index, future.result()[0])
+                indices.append(index)
+            except Exception as e:
+                errors[index] = str(e)
+        self.timings.record('decode', (time.perf_counter() - start) * 1000)
+
+        if not errors:
+            return buffer.batch(len(sources)), indices, errors
+        return buffer.array[indices], indices, errors
+
+    def stats(self):
+        with self._condition:
+            state = {
+                'mode': self.mode,
+                'workers': self.workers,
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self._in_flight,
+                'waiting': self._waiting
+            }
+        state.update(self.timings.stats())
+        return state
+
+
+def decode_config():
+    """Decode stage settings - DECODE_MODE=thread|process, pool sized to the cores by default"""
+    mode = os.environ.get('DECODE_MODE', 'thread')
+    workers = int(os.environ.get('DECODE_WORKERS', 0))
+    if not workers:
+        if mode == 'process':
+            # Every gunicorn worker has its own pool - share the cores between them
+            workers = max(1, available_cores() // max(1, int(os.environ.get('GUNICORN_WORKERS', 1))))
+        else:
+            workers = min(8, available_cores())
+    # Slots are held through the batch scheduler's wait, so fewer than a full micro-batch
+    # of them would keep every batch from filling - and a batch endpoint chunk holds one per image
+    max_in_flight = int(os.environ.get('DECODE_MAX_IN_FLIGHT', 0)) or max(
+        2 * workers, batching_config()['max_batch_size'], int(os.environ.get('BATCH_ENDPOINT_CHUNK', 16)))
+    return {
+        'mode': mode,
+        'workers': workers,
+        'max_in_flight': max_in_flight,
+        'admit_timeout': float(os.environ.get('DECODE_ADMIT_TIMEOUT', 30))
+    }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+ONNX exporter for the cookware classifiers
+Exports every models/*.keras file to models/<name>.onnx with tf2onnx and checks the
+ONNX Runtime output and latency against Keras
+
+Usage:
+    pip install tf2onnx onnxruntime
+    python export-onnx.py
+    python export-onnx.py --opset 17 --intra-op-threads 2
+Serve with INFERENCE_BACKEND=onnx (requirements-onnx.txt drops TensorFlow from the image)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference import INPUT_SHAPE, CompiledPredictor, OnnxPredictor, onnx_path
+
+
+def export(model, output_path, opset):
+    """Export a loaded Keras model with a dynamic batch dimension"""
+    import tensorflow as tf
+    import tf2onnx
+
+    signature = (tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name='images'),)
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=output_path)
+
+
+def mean_latency_ms(predict, images):
+    """Mean single-image latency after one untimed call"""
+    predict(images[:1])
+    start = time.perf_counter()
+    for i in range(len(images)):
+        predict(images[i:i + 1])
+    return (time.perf_counter() - start) * 1000 / len(images)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export cookware models to ONNX')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--opset', type=int, default=15)
+    parser.add_argument('--samples', type=int, default=16, help='synthetic images for the parity check')
+    parser.add_argument('--intra-op-threads', type=int)
+    parser.add_argument('--inter-op-threads', type=int)
+    parser.add_argument('--optimization-level', choices=['disable', 'basic', 'extended', 'all'])
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    keras_files = sorted(Path(args.models_dir).glob('*.keras'))
+    if not keras_files:
+        print(f"❌ No .keras model files found in {args.models_dir}")
+        return 1
+
+    images = np.random.default_rng(0).random((args.samples,) + INPUT_SHAPE, dtype=np.float32)
+
+    report = {'tensorflow': tf.__version__, 'opset': args.opset, 'models': {}}
+    for keras_file in keras_files:
+        print(f"\n🔄 Exporting {keras_file.name}")
+        model = tf.keras.models.load_model(keras_file)
+        output_path = onnx_path(str(keras_file))
+        export(model, output_path, args.opset)
+
+        keras_predict = CompiledPredictor(model)
+        onnx_predict = OnnxPredictor(output_path, intra_op_threads=args.intra_op_threads,
+                                     inter_op_threads=args.inter_op_threads,
+                                     optimization_level=args.optimization_level)
+
+        reference = keras_predict(images)
+        candidate = onnx_predict(images)
+        keras_ms = mean_latency_ms(keras_predict, images)
+        onnx_ms = mean_latency_ms(onnx_predict, images)
+
+        entry = {
+            'file': os.path.basename(output_path),
+            'size_mb': round(os.path.getsize(output_path) / 1e6, 2),
+            'session': onnx_predict.config,
+            'top1_agreement': round(float(np.mean(reference.argmax(1) == candidate.argmax(1))), 4),
+            'max_abs_prob_diff': round(float(np.max(np.abs(reference - candidate))), 6),
+            'keras_latency_ms': round(keras_ms, 2),
+            'onnx_latency_ms': round(onnx_ms, 2),
+            'speedup_vs_keras': round(keras_ms / onnx_ms, 2)
+        }
+        report['models'][keras_file.name] = entry
+        print(f"  ✅ {entry}")
+
+    report_path = Path(args.models_dir) / 'onnx_report.json'
+    report_path.write_text(json.dumps(report, indent=2))
+    print(f"\n📄 Report written to {report_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,45 @@
 # Gunicorn configuration for Koyeb deployment
+import glob
+import itertools
 import os
+import tempfile
+
+import cpu_topology
 
 # Server socket
 bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
 backlog = 2048
 
-# Worker processes
-workers = 1  # Single worker to avoid model loading multiple times
-worker_class = "sync"
+# Prometheus multiprocess mode: every worker writes its metrics under this directory and
+# /metrics on any worker aggregates them. It must be set (and emptied of a previous run's
+# files) before the app, and so prometheus_client, is imported.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'cookware-metrics'))
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+for stale in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+    os.remove(stale)
+
+# Load the model in the master during preload_app (see app.preload_requested), so forked
+# workers share the weights copy-on-write - but only for runtimes that survive fork()
+# (ONNX Runtime, tflite_runtime). TensorFlow's thread pools don't, so Keras models are
+# loaded and warmed by each worker in post_fork. PRELOAD_MODEL=1 forces master preload.
+os.environ.setdefault('PRELOAD_MODEL', 'auto')
+
+# Workers, threads and inference thread pools planned from the cores this container may use
+# (CPU_PROFILE=balanced|throughput|latency); GUNICORN_WORKERS / GUNICORN_THREADS /
+# TF_NUM_INTRAOP_THREADS etc. override the plan. Exported before the app (and TF) is imported.
+topology = cpu_topology.plan_topology()
+cpu_topology.apply_thread_env(topology)
+os.environ.setdefault('GUNICORN_WORKERS', str(topology['workers']))
+
+# Worker processes - the model is loaded once before fork, so extra workers
+# cost little memory and give real multi-core throughput
+workers = topology['workers']
+# SERVER_MODE=asgi (app module asgi:app) runs uvicorn workers: uploads are received
+# asynchronously and only complete ones occupy an inference thread
+worker_class = "uvicorn.workers.UvicornWorker" if os.environ.get('SERVER_MODE') == 'asgi' else "sync"
+# Threads per worker - above 1 gunicorn switches to gthread, which lets
+# concurrent requests share forward passes when BATCH_MAX_SIZE > 1
+threads = topology['threads']
 worker_connections = 1000
 timeout = 120  # Longer timeout for ML inference
 keepalive = 2
@@ -16,7 +48,7 @@ keepalive = 2
 max_requests = 1000
 max_requests_jitter = 100
 
-# Preload application for better performance
+# Preload application for better performance - required for the shared model
 preload_app = True
 
 # Logging
@@ -32,3 +64,45 @@ proc_name = "cookware-analyzer"
 limit_request_line = 4094
 limit_request_fields = 100
 limit_request_field_size = 8190
+
+def when_ready(server):
+    """Log whether the preloaded app came up with the real model"""
+    import app
+    plan = (f"{workers} worker(s) x {threads} thread(s), "
+            f"{topology['intra_op_threads']} intra-op thread(s) each on {topology['cores']} core(s)")
+    if app.model is not None:
+        server.log.info(f"Model {app.model_file} preloaded - forking {plan}")
+    else:
+        server.log.info(f"Model not preloaded in master - each of {plan} loads and warms its own after fork")
+
+def pre_fork(server, worker):
+    """Give each worker a CPU slot - a replacement worker reuses the slot of the one it replaces"""
+    taken = {getattr(other, 'cpu_slot', None) for other in server.WORKERS.values()}
+    worker.cpu_slot = next(slot for slot in itertools.count() if slot not in taken)
+
+def post_fork(server, worker):
+    """Load and warm the model in each worker unless the master preloaded it. Start the
+    job runner in each worker, so queued jobs (including ones left by a
+    recycled worker) are picked up without waiting for a request to /api/jobs, and
+    begin background loads of any MODEL_PRELOAD models. Each worker also watches models/
+    for a new default model and hot-swaps it (a worker recycled after a swap starts from the
+    master's preloaded model, or loads the current one, and catches up on its first poll)"""
+    if topology['affinity']:
+        cpus = cpu_topology.pin_worker(worker.cpu_slot, topology)
+        server.log.info(f"Worker {worker.pid} pinned to CPUs {cpus}")
+    import app
+    # A no-op when the master preloaded the model; otherwise the worker loads and warms it
+    # before it serves (Keras - TensorFlow must not run before fork)
+    if not app.ensure_model_loaded():
+        server.log.warning(f"Worker {worker.pid}: model failed to load - serving mock analysis")
+    if app.get_job_runner() is not None:
+        server.log.info(f"Worker {worker.pid} processing background jobs")
+    app.get_model_reloader()
+    preloading = app.preload_models()
+    if preloading:
+        server.log.info(f"Worker {worker.pid} loading {', '.join(preloading)} in the background")
+
+def child_exit(server, worker):
+    """Drop an exited worker's live gauges (in-flight requests, queue depths) from /metrics"""
+    import metrics
+    metrics.mark_process_dead(worker.pid)
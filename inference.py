@@ -0,0 +1,261 @@
+"""
+Inference backends for the cookware classifiers
+- keras:  compiled tf.function traced once for a fixed input signature (replaces model.predict)
+- tflite: TFLite interpreter over a converted .tflite file (see convert-tflite.py)
+- onnx:   ONNX Runtime CPU session over an exported .onnx file (see export-onnx.py)
+The backend is chosen per deployment with INFERENCE_BACKEND
+"""
+
+import os
+import threading
+import logging
+
+import numpy as np
+
+import lazy_imports
+import metrics
+from lazy_imports import configured_backend
+
+logger = logging.getLogger(__name__)
+
+INPUT_SHAPE = (224, 224, 3)
+
+TFLITE_VARIANTS = ('float32', 'int8', 'float16')
+
+
+def tflite_path(keras_path, variant='float32'):
+    """models/<name>.keras -> models/<name>.<variant>.tflite"""
+    stem, _ = os.path.splitext(keras_path)
+    return f"{stem}.{variant}.tflite"
+
+
+def onnx_path(keras_path):
+    """models/<name>.keras -> models/<name>.onnx"""
+    stem, _ = os.path.splitext(keras_path)
+    return f"{stem}.onnx"
+
+
+def select_model_file(keras_path, warn=True):
+    """Map a .keras model path to the file the configured backend serves.
+
+    warn=False skips the missing-file warning for callers that poll (the hot reload watcher).
+    """
+    backend = configured_backend()
+    if backend == 'tflite':
+        variant = os.environ.get('TFLITE_VARIANT', 'float32')
+        candidate = tflite_path(keras_path, variant)
+        if os.path.exists(candidate):
+            return candidate
+        if warn:
+            logger.warning(f"{candidate} not found - run convert-tflite.py; falling back to Keras")
+    elif backend == 'onnx':
+        candidate = onnx_path(keras_path)
+        if os.path.exists(candidate):
+            return candidate
+        if warn:
+            logger.warning(f"{candidate} not found - run export-onnx.py; falling back to Keras")
+    return keras_path
+
+
+def load_model_file(model_path):
+    """Load a model file with the runtime that matches its format.
+
+    Keras models come back wrapped in their CompiledPredictor, so the predictor lives
+    exactly as long as whoever holds the loaded model - dropping it frees both.
+    """
+    if model_path.endswith('.tflite'):
+        return TFLitePredictor(model_path)
+    if model_path.endswith('.onnx'):
+        return OnnxPredictor(model_path)
+    tf = lazy_imports.tensorflow()
+    return CompiledPredictor(tf.keras.models.load_model(model_path))
+
+
+def fork_safe(model_path):
+    """True when model_path loads without TensorFlow - ONNX Runtime, or TFLite on tflite_runtime.
+
+    Only such models may be loaded in a gunicorn master before fork(): TensorFlow's
+    thread pools don't survive it, and workers' predict calls can hang.
+    """
+    if model_path.endswith('.onnx'):
+        return True
+    return model_path.endswith('.tflite') and lazy_imports.module_available('tflite_runtime')
+
+
+class Predictor:
+    """Base class for loaded backends that are called directly instead of via model.predict"""
+
+    backend = None
+
+    def __call__(self, batch):
+        raise NotImplementedError
+
+    def predict(self, batch):
+        """Drop-in for model.predict"""
+        return self(batch)
+
+
+def _as_batch(batch, input_shape):
+    """float32 array with a leading batch dimension"""
+    batch = np.asarray(batch, dtype=np.float32)
+    if batch.ndim == len(input_shape):
+        batch = batch[np.newaxis]
+    return batch
+
+
+class CompiledPredictor(Predictor):
+    """Single-call inference wrapper - one trace serves every batch size from 1 to N"""
+
+    backend = 'keras'
+
+    def __init__(self, model, input_shape=INPUT_SHAPE):
+        tf = lazy_imports.tensorflow()
+
+        self.model = model
+        self.input_shape = tuple(input_shape)
+        self.trace_count = 0
+
+        # Leading None keeps the batch dimension symbolic, so batches of any size reuse the trace
+        signature = [tf.TensorSpec(shape=(None,) + self.input_shape, dtype=tf.float32)]
+
+        def forward(images):
+            # Python side effect - only runs while tracing
+            self.trace_count += 1
+            return model(images, training=False)
+
+        self._forward = tf.function(forward, input_signature=signature)
+
+    def __call__(self, batch):
+        """Predict a float32 batch of shape (N, H, W, C) and return a numpy array"""
+        return self._forward(_as_batch(batch, self.input_shape)).numpy()
+
+
+class TFLitePredictor(Predictor):
+    """TFLite interpreter backend - float32, dynamic-range int8 or float16 .tflite files"""
+
+    backend = 'tflite'
+
+    def __init__(self, model_path, num_threads=None):
+        # The standalone runtime is much smaller than full TensorFlow; use it when installed
+        if lazy_imports.module_available('tflite_runtime'):
+            Interpreter = lazy_imports.import_module('tflite_runtime.interpreter').Interpreter
+        else:
+            Interpreter = lazy_imports.tensorflow().lite.Interpreter
+
+        if num_threads is None and os.environ.get('TFLITE_NUM_THREADS'):
+            num_threads = int(os.environ['TFLITE_NUM_THREADS'])
+
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(int(dim) for dim in self._input['shape'][1:])
+        self._batch_size = int(self._input['shape'][0])
+
+        # The interpreter owns one set of tensors, so calls are serialized
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        """Predict a float32 batch of shape (N, H, W, C) and return a numpy array"""
+        batch = _as_batch(batch, self.input_shape)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+
+            self.interpreter.set_tensor(self._input['index'], self._quantize(batch))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self._output['index']))
+
+    def _quantize(self, batch):
+        """Fully quantized models take integer input - dynamic-range ones stay float32"""
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return batch
+        scale, zero_point = self._input['quantization']
+        return np.round(batch / scale + zero_point).astype(dtype)
+
+    def _dequantize(self, output):
+        if output.dtype == np.float32:
+            return output.copy()
+        scale, zero_point = self._output['quantization']
+        return (output.astype(np.float32) - zero_point) * scale
+
+
+ORT_OPTIMIZATION_LEVELS = {
+    'disable': 'ORT_DISABLE_ALL',
+    'basic': 'ORT_ENABLE_BASIC',
+    'extended': 'ORT_ENABLE_EXTENDED',
+    'all': 'ORT_ENABLE_ALL'
+}
+
+
+def ort_session_config():
+    """ONNX Runtime settings from the environment (0 threads = let ORT decide)"""
+    return {
+        'intra_op_threads': int(os.environ.get('ORT_INTRA_OP_THREADS', 0)),
+        'inter_op_threads': int(os.environ.get('ORT_INTER_OP_THREADS', 0)),
+        'optimization_level': os.environ.get('ORT_GRAPH_OPT_LEVEL', 'all').lower()
+    }
+
+
+class OnnxPredictor(Predictor):
+    """ONNX Runtime CPU backend - no TensorFlow import needed at serving time"""
+
+    backend = 'onnx'
+
+    def __init__(self, model_path, intra_op_threads=None, inter_op_threads=None, optimization_level=None):
+        ort = lazy_imports.import_module('onnxruntime')
+
+        config = ort_session_config()
+        if intra_op_threads is not None:
+            config['intra_op_threads'] = intra_op_threads
+        if inter_op_threads is not None:
+            config['inter_op_threads'] = inter_op_threads
+        if optimization_level is not None:
+            config['optimization_level'] = optimization_level
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = config['intra_op_threads']
+        options.inter_op_num_threads = config['inter_op_threads']
+        level = ORT_OPTIMIZATION_LEVELS.get(config['optimization_level'], 'ORT_ENABLE_ALL')
+        options.graph_optimization_level = getattr(ort.GraphOptimizationLevel, level)
+
+        self.model_path = model_path
+        self.config = config
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self._input_name = self.session.get_inputs()[0].name
+        self.input_shape = INPUT_SHAPE
+
+    def __call__(self, batch):
+        """Predict a float32 batch of shape (N, H, W, C) and return a numpy array"""
+        # InferenceSession.run is thread-safe, so no lock is needed here
+        return self.session.run(None, {self._input_name: _as_batch(batch, self.input_shape)})[0]
+
+
+def get_predictor(model):
+    """Return the predictor for a model loaded with load_model_file.
+
+    A bare Keras model is rejected rather than wrapped: wrapping it here would build a new
+    tf.function, and pay a full trace, on every call.
+    """
+    if isinstance(model, Predictor):
+        return model
+    raise TypeError(f"{type(model).__name__} is not a loaded predictor - load models with "
+                    f"inference.load_model_file (or wrap them once in CompiledPredictor)")
+
+
+def predict(model, batch):
+    """Run batch through the compiled path for model"""
+    with metrics.timed('predict'):
+        return get_predictor(model)(batch)
+
+
+def backend_of(model):
+    """Name of the backend that serves predictions for model"""
+    if isinstance(model, Predictor):
+        return model.backend
+    return CompiledPredictor.backend
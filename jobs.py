@@ -0,0 +1,358 @@
+"""
+Asynchronous analysis jobs backed by SQLite
+POST /api/jobs stores the uploaded images and returns at once; background threads in
+every gunicorn worker claim queued jobs from the shared database, so a job outlives the
+request that created it and a worker recycled by max_requests mid-job (its pid is gone)
+has the job re-queued by the next worker that starts. A job whose outcome can't be stored
+(database locked, disk full) is re-queued too, so it is retried rather than stuck running.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    worker_pid INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    image_count INTEGER NOT NULL,
+    upload_mode TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS job_images (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+
+class QueueFull(Exception):
+    """Raised by JobStore.submit when max_queued jobs are already waiting"""
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Job table in a SQLite file shared by all worker processes on the host"""
+
+    def __init__(self, path, max_queued=100, max_attempts=2, ttl_seconds=3600):
+        self.path = path
+        self.max_queued = int(max_queued)
+        self.max_attempts = int(max_attempts)
+        self.ttl = float(ttl_seconds)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection per operation - sqlite3 connections aren't shared across threads"""
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def submit(self, images, upload_mode=None):
+        """Persist a job of encoded image bytes and return its id; raises QueueFull"""
+        job_id = uuid.uuid4().hex
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued >= self.max_queued:
+                    raise QueueFull(f'{queued} jobs already queued')
+                db.execute(
+                    "INSERT INTO jobs (id, status, created, image_count, upload_mode) VALUES (?, 'queued', ?, ?, ?)",
+                    (job_id, time.time(), len(images), upload_mode)
+                )
+                db.executemany(
+                    'INSERT INTO job_images (job_id, position, data) VALUES (?, ?, ?)',
+                    [(job_id, position, sqlite3.Binary(data)) for position, data in enumerate(images)]
+                )
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return job_id
+
+    def claim(self):
+        """Atomically move the oldest queued job to running for this process - (id, images) or None"""
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                row = db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    db.execute('COMMIT')
+                    return None
+                job_id = row[0]
+                db.execute(
+                    "UPDATE jobs SET status = 'running', started = ?, worker_pid = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (time.time(), os.getpid(), job_id)
+                )
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            images = [bytes(data) for (data,) in db.execute(
+                'SELECT data FROM job_images WHERE job_id = ? ORDER BY position', (job_id,)
+            )]
+        return job_id, images
+
+    def finish(self, job_id, result=None, error=None):
+        """Store the outcome and drop the uploaded images"""
+        with self._connect() as db:
+            db.execute(
+                'UPDATE jobs SET status = ?, finished = ?, result = ?, error = ? WHERE id = ?',
+                ('failed' if error else 'done', time.time(),
+                 json.dumps(result) if result is not None else None, error, job_id)
+            )
+            db.execute('DELETE FROM job_images WHERE job_id = ?', (job_id,))
+
+    def get(self, job_id):
+        """Job status dict (with the result once done), or None for an unknown id"""
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = {
+                'job_id': row['id'],
+                'status': row['status'],
+                'image_count': row['image_count'],
+                'upload_mode': row['upload_mode'],
+                'attempts': row['attempts'],
+                'created_at': row['created'],
+                'started_at': row['started'],
+                'finished_at': row['finished']
+            }
+            if row['status'] == 'queued':
+                job['queue_position'] = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created <= ?", (row['created'],)
+                ).fetchone()[0]
+            if row['result'] is not None:
+                job['result'] = json.loads(row['result'])
+            if row['error'] is not None:
+                job['error'] = row['error']
+            return job
+
+    def recover(self, held=()):
+        """Re-queue running jobs whose worker process has died - or that belong to this process
+        but are not in held (the job ids its runner threads are working on, e.g. one whose
+        outcome could not be stored); fail them after max_attempts"""
+        recovered = 0
+        own_pid = os.getpid()
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                rows = db.execute("SELECT id, worker_pid, attempts FROM jobs WHERE status = 'running'").fetchall()
+                for job_id, worker_pid, attempts in rows:
+                    if worker_pid == own_pid:
+                        if job_id in held:
+                            continue
+                    elif worker_pid is not None and pid_alive(worker_pid):
+                        continue
+                    recovered += self._release(db, job_id, attempts)
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return recovered
+
+    def requeue(self, job_id):
+        """Put a running job whose outcome couldn't be stored back in the queue (its attempt stays counted)"""
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                row = db.execute("SELECT attempts FROM jobs WHERE id = ? AND status = 'running'",
+                                 (job_id,)).fetchone()
+                requeued = self._release(db, job_id, row[0]) if row is not None else 0
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return bool(requeued)
+
+    def _release(self, db, job_id, attempts):
+        """Re-queue a running job, or fail it after max_attempts - 1 if re-queued"""
+        if attempts >= self.max_attempts:
+            db.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = ? WHERE id = ?",
+                (time.time(), f'Job was not completed in {attempts} attempt(s)', job_id)
+            )
+            db.execute('DELETE FROM job_images WHERE job_id = ?', (job_id,))
+            return 0
+        db.execute("UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?", (job_id,))
+        return 1
+
+    def purge(self):
+        """Delete finished jobs older than the TTL"""
+        with self._connect() as db:
+            cursor = db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (time.time() - self.ttl,)
+            )
+            return cursor.rowcount
+
+    def stats(self):
+        with self._connect() as db:
+            counts = dict(db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        return {
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'max_queued': self.max_queued
+        }
+
+
+class JobRunner:
+    """Background threads in one worker process that claim and process jobs from a JobStore"""
+
+    # Seconds between attempts to store a job's outcome
+    FINISH_BACKOFF = (0.5, 1.0, 2.0, 4.0)
+
+    def __init__(self, store, process_fn, workers=1, poll_seconds=1.0):
+        self.store = store
+        self.process_fn = process_fn
+        self.workers = max(1, int(workers))
+        self.poll = float(poll_seconds)
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._last_purge = 0.0
+        self._held = set()  # job ids this process's threads are working on
+        self._held_lock = threading.Lock()  # a claimed job is held before any recover sweep can see it
+        self.processed = 0
+
+    def start(self):
+        """Recover jobs orphaned by dead workers and start the threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            with self._held_lock:
+                recovered = self.store.recover(set(self._held))
+            if recovered:
+                logger.info(f"Re-queued {recovered} job(s) left running by an exited worker")
+            self._stopped = False
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'job-runner-{number}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def notify(self):
+        """Wake an idle thread - a job was just submitted by this process"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            # Nothing may end this thread - start() won't replace it, so this worker would stop
+            # processing jobs for good. A job whose outcome can't be stored is re-queued
+            # (by requeue, or by the next recover sweep).
+            try:
+                self._step()
+            except Exception as e:
+                logger.error(f"Job runner error: {str(e)}")
+                self._wakeup.wait(self.poll)
+                self._wakeup.clear()
+
+    def _step(self):
+        """Claim and process one job, or wait for one (recovering and purging once a minute)"""
+        with self._held_lock:
+            try:
+                claimed = self.store.claim()
+            except sqlite3.Error as e:
+                logger.error(f"Job claim failed: {str(e)}")
+                claimed = None
+            if claimed is not None:
+                self._held.add(claimed[0])
+
+        if claimed is None:
+            # Other workers' submissions are only seen by polling
+            self._wakeup.wait(self.poll)
+            self._wakeup.clear()
+            if time.monotonic() - self._last_purge > 60:
+                # Set first, so a failing recover/purge is retried in a minute, not every poll
+                self._last_purge = time.monotonic()
+                with self._held_lock:
+                    self.store.recover(set(self._held))
+                self.store.purge()
+            return
+
+        job_id, images = claimed
+        try:
+            try:
+                outcome = {'result': self.process_fn(images)}
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                outcome = {'error': str(e)}
+            if not self._finish(job_id, outcome):
+                try:
+                    self.store.requeue(job_id)
+                except sqlite3.Error as e:
+                    logger.error(f"Job {job_id} could not be re-queued, the next sweep will: {str(e)}")
+        finally:
+            with self._held_lock:
+                self._held.discard(job_id)
+            self.processed += 1
+
+    def _finish(self, job_id, outcome):
+        """Store a job's outcome, retrying with backoff while the database is locked - True once stored"""
+        for delay in self.FINISH_BACKOFF + (None,):
+            try:
+                self.store.finish(job_id, **outcome)
+                return True
+            except sqlite3.Error as e:
+                if delay is None:
+                    logger.error(f"Job {job_id} outcome could not be stored - re-queueing it: {str(e)}")
+                    return False
+                logger.warning(f"Storing job {job_id} failed, retrying in {delay}s: {str(e)}")
+                time.sleep(delay)
+
+def jobs_config():
+    """Job API settings - JOBS=0 disables /api/jobs"""
+    return {
+        'enabled': os.environ.get('JOBS', '1') == '1',
+        'db_path': os.environ.get('JOBS_DB', os.path.join(tempfile.gettempdir(), 'cookware-jobs.sqlite3')),
+        'workers': int(os.environ.get('JOBS_WORKERS', 1)),
+        'max_queued': int(os.environ.get('JOBS_MAX_QUEUED', 100)),
+        'max_images': int(os.environ.get('JOBS_MAX_IMAGES', 512)),
+        'max_attempts': int(os.environ.get('JOBS_MAX_ATTEMPTS', 2)),
+        'ttl_seconds': float(os.environ.get('JOBS_TTL', 3600)),
+        'poll_seconds': float(os.environ.get('JOBS_POLL_SECONDS', 1.0))
+    }
@@ -0,0 +1,87 @@
+"""
+Lazy import layer for the inference backends
+Availability is checked with importlib.util.find_spec (no import), and the heavy
+runtime (TensorFlow, ONNX Runtime, TFLite) is only imported when inference needs it.
+Kept free of numpy/TF imports so health endpoints can use it cheaply.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+import logging
+
+import cpu_topology
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('keras', 'tflite', 'onnx')
+
+# Modules that can serve each backend, in order of preference
+BACKEND_MODULES = {
+    'keras': ('tensorflow',),
+    'tflite': ('tflite_runtime', 'tensorflow'),
+    'onnx': ('onnxruntime',)
+}
+
+_import_times = {}
+_import_lock = threading.Lock()
+
+
+def configured_backend():
+    """Backend selected for this deployment (INFERENCE_BACKEND, default keras)"""
+    backend = os.environ.get('INFERENCE_BACKEND', 'keras').lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown INFERENCE_BACKEND '{backend}', using keras")
+        return 'keras'
+    return backend
+
+
+def module_available(name):
+    """True if name can be imported - checked without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def backend_available(backend=None):
+    """True if any runtime for backend (default: the configured one) is installed"""
+    backend = backend or configured_backend()
+    return any(module_available(name) for name in BACKEND_MODULES.get(backend, ()))
+
+
+def is_imported(name):
+    """True once the module has actually been imported in this process"""
+    return name in sys.modules
+
+
+def import_module(name):
+    """Import name on first use and record how long the import took"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _import_lock:
+        if name not in _import_times:
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            _import_times[name] = time.perf_counter() - start
+            logger.info(f"Imported {name} in {_import_times[name] * 1000:.0f}ms")
+            return module
+    return importlib.import_module(name)
+
+
+def tensorflow():
+    """The tensorflow module, imported on first call with its thread pools sized (see cpu_topology)"""
+    first = not is_imported('tensorflow')
+    tf = import_module('tensorflow')
+    if first:
+        cpu_topology.configure_tensorflow(tf)
+    return tf
+
+
+def import_times_ms():
+    """Import durations of lazily loaded runtimes, for health and metrics reporting"""
+    return {name: round(seconds * 1000, 1) for name, seconds in _import_times.items()}
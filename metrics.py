@@ -0,0 +1,192 @@
+"""
+Prometheus metrics for the analyzer
+Per-stage latency histograms (base64 decode, image decode, resize, normalize, predict,
+serialize, queue waits), model load time, the serving model version and hot-reload swap
+latency, cache lookups, cascade stage answers, in-flight requests and queue depths,
+rendered at /metrics. Under gunicorn every worker writes to the
+shared PROMETHEUS_MULTIPROC_DIR (set up in gunicorn.conf.py) and a scrape of any worker
+aggregates all of them. Without prometheus_client installed, or with METRICS=0,
+every call here is a no-op.
+"""
+
+import math
+import os
+import time
+
+from lazy_imports import module_available
+
+ENABLED = os.environ.get('METRICS', '1') == '1' and module_available('prometheus_client')
+
+# Seconds - from sub-millisecond stages (normalize, base64) up to cold predictions
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds to load and warm a replacement model
+SWAP_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+if ENABLED:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                                   Histogram, generate_latest, multiprocess)
+
+    STAGE_SECONDS = Histogram('cookware_stage_seconds', 'Time spent in each analysis stage',
+                              ['stage'], buckets=BUCKETS)
+    REQUEST_SECONDS = Histogram('cookware_request_seconds', 'End-to-end API request latency',
+                                ['endpoint'], buckets=BUCKETS)
+    REQUESTS = Counter('cookware_requests_total', 'API requests by endpoint and status code',
+                       ['endpoint', 'status'])
+    IN_FLIGHT = Gauge('cookware_in_flight_requests', 'API requests being served',
+                      multiprocess_mode='livesum')
+    QUEUE_DEPTH = Gauge('cookware_queue_depth', 'Items waiting in or passing through each queue',
+                        ['queue'], multiprocess_mode='livesum')
+    JOBS_QUEUED = Gauge('cookware_jobs_queued', 'Jobs waiting in the shared job database',
+                        multiprocess_mode='mostrecent')
+    MODEL_LOAD_SECONDS = Gauge('cookware_model_load_seconds', 'Time taken to load the model',
+                               ['model_file'], multiprocess_mode='max')
+    MODEL_WARMUP_SECONDS = Gauge('cookware_model_warmup_seconds',
+                                 'Time taken to warm the model at every served batch size',
+                                 ['model_file'], multiprocess_mode='max')
+    CACHE_LOOKUPS = Counter('cookware_cache_lookups_total', 'Result cache lookups',
+                            ['cache', 'result'])
+    # Per worker (pid label) - each worker swaps on its own
+    MODEL_INFO = Gauge('cookware_model_info', 'Default model served by each worker (1 = serving)',
+                       ['model_file', 'version'], multiprocess_mode='liveall')
+    MODEL_SWAP_SECONDS = Histogram('cookware_model_swap_seconds',
+                                   'Hot reload time from trigger to the new model serving', buckets=SWAP_BUCKETS)
+    MODEL_RELOADS = Counter('cookware_model_reloads_total', 'Hot model reloads by outcome', ['result'])
+    CASCADE_ANSWERS = Counter('cookware_cascade_answers_total', 'Images answered by each cascade stage',
+                              ['stage'])
+
+_stage_children = {}
+_active_model = None
+
+
+class _Timer:
+    """Context manager that observes elapsed seconds into one histogram child"""
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def _stage(stage):
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_SECONDS.labels(stage=stage)
+    return child
+
+
+def timed(stage):
+    """with timed('resize'): ... - records the block's duration for stage"""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(_stage(stage))
+
+
+def observe(stage, seconds):
+    if ENABLED:
+        _stage(stage).observe(seconds)
+
+
+def cache_lookup(cache, hit):
+    if ENABLED:
+        CACHE_LOOKUPS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def cascade_answers(stage, count):
+    if ENABLED:
+        CASCADE_ANSWERS.labels(stage=stage).inc(count)
+
+
+def queue_changed(queue, delta):
+    """Adjust a queue depth gauge by delta items (this process's share)"""
+    if ENABLED:
+        QUEUE_DEPTH.labels(queue=queue).inc(delta)
+
+
+def jobs_queued(count):
+    if ENABLED:
+        JOBS_QUEUED.set(count)
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list - for the /api/stats summaries"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+def model_loaded(model_file, seconds):
+    if ENABLED:
+        MODEL_LOAD_SECONDS.labels(model_file=model_file).set(seconds)
+
+
+def model_warmed(model_file, seconds):
+    if ENABLED:
+        MODEL_WARMUP_SECONDS.labels(model_file=model_file).set(seconds)
+
+
+def model_active(model_file, version):
+    """Mark the default model this process now serves (and clear the one it replaced)"""
+    global _active_model
+    if ENABLED:
+        if _active_model is not None and _active_model != (model_file, version):
+            MODEL_INFO.labels(*_active_model).set(0)
+        MODEL_INFO.labels(model_file=model_file, version=version).set(1)
+        _active_model = (model_file, version)
+
+
+def model_reload_finished(ok, seconds):
+    if ENABLED:
+        MODEL_RELOADS.labels(result='ok' if ok else 'failed').inc()
+        if ok:
+            MODEL_SWAP_SECONDS.observe(seconds)
+
+
+def request_started():
+    if ENABLED:
+        IN_FLIGHT.inc()
+
+
+def request_finished(endpoint, status, seconds):
+    if ENABLED:
+        IN_FLIGHT.dec()
+        REQUESTS.labels(endpoint=endpoint, status=str(status)).inc()
+        REQUEST_SECONDS.labels(endpoint=endpoint).observe(seconds)
+
+
+def render():
+    """(payload, content_type) for /metrics - aggregated over all workers in multiprocess mode"""
+    if not ENABLED:
+        return b'# metrics disabled (METRICS=0 or prometheus_client not installed)\n', 'text/plain; charset=utf-8'
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauges (gunicorn child_exit hook)"""
+    if ENABLED and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,95 @@
+"""
+Process-wide model cache for the Cookware Analyzer
+Loads each model file at most once per warm instance and shares it across requests
+"""
+
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def load_model_file(model_path):
+    """Default loader - Keras models via TensorFlow, .tflite files via the interpreter"""
+    from inference import load_model_file as load
+    return load(model_path)
+
+
+class ModelCache:
+    """Thread-safe, lazily populated cache of loaded models keyed by file path"""
+
+    def __init__(self, loader=None):
+        self.loader = loader or load_model_file
+        self._models = {}
+        self._load_times = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_path):
+        """Return (model, cache_info) for model_path, loading it on first use"""
+        key = os.path.abspath(model_path)
+
+        # Fast path - model already loaded by an earlier request
+        model = self._models.get(key)
+        if model is not None:
+            with self._lock:
+                self.hits += 1
+            return model, self._cache_info(key, hit=True)
+
+        # Slow path - only one thread loads, the others wait for it
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self.hits += 1
+                return model, self._cache_info(key, hit=True)
+
+            self.misses += 1
+            start = time.perf_counter()
+            model = self.loader(key)
+            load_time = time.perf_counter() - start
+
+            self._models[key] = model
+            self._load_times[key] = load_time
+            logger.info(f"Model loaded from {key} in {load_time * 1000:.0f}ms")
+
+        return model, self._cache_info(key, hit=False)
+
+    def is_loaded(self, model_path):
+        """Check whether model_path is already in the cache"""
+        return os.path.abspath(model_path) in self._models
+
+    def clear(self):
+        """Drop all cached models"""
+        with self._lock:
+            self._models.clear()
+            self._load_times.clear()
+
+    def _cache_info(self, key, hit):
+        """Per-request cache metadata"""
+        return {
+            'cache_hit': hit,
+            'load_time_ms': round(self._load_times.get(key, 0.0) * 1000, 1),
+            'model_file': os.path.basename(key)
+        }
+
+    def stats(self):
+        """Cache counters for health and metrics reporting"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'loaded_models': [os.path.basename(path) for path in self._models],
+                'load_times_ms': {
+                    os.path.basename(path): round(seconds * 1000, 1)
+                    for path, seconds in self._load_times.items()
+                }
+            }
+
+
+# Shared instance - one per Python process / warm serverless container
+model_cache = ModelCache()
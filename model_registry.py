@@ -0,0 +1,263 @@
+"""
+Registry of loaded cookware models for per-request model selection
+Every models/*.keras file can be served side by side: a request names a model (optimized,
+proven, original), a version (0.4034) or a file stem, and the registry hands back the
+loaded model - loading it on a background thread if needed. Loaded models share a RAM
+budget; the least recently used one is evicted to make room, except for the app's default
+model, which stays pinned.
+"""
+
+import gc
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import numpy as np
+
+import inference
+import metrics
+from result_cache import model_identity
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownModel(KeyError):
+    """No model file matches the requested name or version"""
+
+
+class ModelLoading(Exception):
+    """The requested model is still loading in the background"""
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def estimate_bytes(model_path, grown):
+    """Memory charged to a model: RSS growth while loading it, at least its file size"""
+    try:
+        size = os.path.getsize(model_path)
+    except OSError:
+        size = 0
+    return max(size, grown or 0)
+
+
+def describe(keras_path):
+    """(name, version) of a model file - optimized_cookware_acc_0.2898.keras -> ('optimized', '0.2898')"""
+    stem = os.path.splitext(os.path.basename(keras_path))[0]
+    version = stem.rsplit('_acc_', 1)[1] if '_acc_' in stem else stem
+    return stem.split('_', 1)[0], version
+
+
+class ModelEntry:
+    """One loaded model and its bookkeeping.
+
+    pinned marks an entry loaded as the app's default model; it also carries the
+    default model's cascade. source identifies the file it was loaded from.
+    """
+    __slots__ = ('name', 'version', 'keras_path', 'model_file', 'model', 'identity', 'source', 'cascade',
+                 'size_bytes', 'load_seconds', 'pinned', 'requests', 'last_used')
+
+    def __init__(self, keras_path, model_path, model, size_bytes, load_seconds, pinned=False):
+        self.name, self.version = describe(keras_path)
+        self.keras_path = keras_path
+        self.model_file = os.path.basename(model_path)
+        self.model = model
+        self.identity = model_identity(model_path, inference.backend_of(model))
+        self.source = model_identity(model_path)
+        self.cascade = None
+        self.size_bytes = int(size_bytes)
+        self.load_seconds = load_seconds
+        self.pinned = pinned
+        self.requests = 0
+        self.last_used = time.time()
+
+    def info(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'model_file': self.model_file,
+            'backend': inference.backend_of(self.model),
+            'size_mb': round(self.size_bytes / 1024 / 1024, 1),
+            'load_seconds': round(self.load_seconds, 2),
+            'pinned': self.pinned,
+            'requests': self.requests
+        }
+
+
+class ModelRegistry:
+    """Thread-safe LRU of loaded models bounded by an approximate RAM budget"""
+
+    def __init__(self, models_dir='models', max_bytes=768 * 1024 * 1024, load_timeout=30.0, warmup_sizes=(1,)):
+        self.models_dir = models_dir
+        self.warmup_sizes = tuple(warmup_sizes)
+        self.max_bytes = int(max_bytes)
+        self.load_timeout = float(load_timeout)
+        self._entries = OrderedDict()  # keras_path -> ModelEntry, least recently used first
+        self._loading = {}             # keras_path -> Future
+        self._lock = threading.Lock()
+        self._executor = None
+        self.loads = 0
+        self.evictions = 0
+
+    def available(self):
+        """keras_path of every model file in models_dir"""
+        try:
+            names = sorted(os.listdir(self.models_dir))
+        except OSError:
+            return []
+        return [os.path.join(self.models_dir, name) for name in names if name.endswith('.keras')]
+
+    def resolve(self, selector):
+        """keras_path for a file name, file stem, version or model name (newest file wins)"""
+        selector = selector.strip()
+        paths = self.available()
+        for path in paths:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            if selector in (os.path.basename(path), stem):
+                return path
+        for path in paths:
+            if describe(path)[1] == selector:
+                return path
+        named = [path for path in paths if describe(path)[0] == selector]
+        if named:
+            return max(named, key=os.path.getmtime)
+        raise UnknownModel(selector)
+
+    def register(self, entry):
+        """Add a model loaded elsewhere (the app's default model) without loading it again.
+
+        A new pinned entry replaces the previous one - requests still holding the old
+        default finish on it, after which it is freed.
+        """
+        with self._lock:
+            if entry.pinned:
+                for path in [path for path, other in self._entries.items() if other.pinned]:
+                    del self._entries[path]
+            self._entries[entry.keras_path] = entry
+            self._entries.move_to_end(entry.keras_path)
+            self._evict(keep=entry.keras_path)
+        return entry
+
+    def get(self, selector, timeout=None):
+        """Loaded ModelEntry for selector - waits up to timeout seconds for a background load.
+
+        Raises UnknownModel for a name that matches no file and ModelLoading when the
+        model isn't ready in time (the load carries on in the background).
+        """
+        keras_path = self.resolve(selector)
+        with self._lock:
+            entry = self._entries.get(keras_path)
+            if entry is not None:
+                self._entries.move_to_end(keras_path)
+                entry.requests += 1
+                entry.last_used = time.time()
+                return entry
+        future = self.load_async(keras_path)
+        try:
+            entry = future.result(timeout=self.load_timeout if timeout is None else timeout)
+        except FutureTimeout:
+            raise ModelLoading(f"Model {os.path.basename(keras_path)} is loading - retry shortly")
+        with self._lock:
+            entry.requests += 1
+            entry.last_used = time.time()
+        return entry
+
+    def load_async(self, keras_path):
+        """Future for a background load of keras_path (shared by concurrent callers)"""
+        with self._lock:
+            future = self._loading.get(keras_path)
+            if future is None:
+                if self._executor is None:
+                    # One loader thread - created on first use, never in a pre-fork master
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-load')
+                future = self._executor.submit(self._load, keras_path)
+                self._loading[keras_path] = future
+        return future
+
+    def preload(self, selectors):
+        """Start background loads for the listed models (unknown names are logged and skipped)"""
+        for selector in selectors:
+            try:
+                keras_path = self.resolve(selector)
+                if keras_path not in self._entries:
+                    self.load_async(keras_path)
+            except UnknownModel:
+                logger.warning(f"MODEL_PRELOAD: no model file matches {selector!r}")
+
+    def _load(self, keras_path):
+        try:
+            model_path = inference.select_model_file(keras_path)
+            rss_before = rss_bytes()
+            start = time.perf_counter()
+            model = inference.load_model_file(model_path)
+            # Warm it here at every served batch size, so the first request routed to it doesn't
+            # pay for tracing and allocation
+            for size in self.warmup_sizes:
+                inference.predict(model, np.zeros((size,) + inference.INPUT_SHAPE, dtype=np.float32))
+            load_seconds = time.perf_counter() - start
+            grown = rss_bytes() - rss_before if rss_before is not None else None
+            metrics.model_loaded(os.path.basename(model_path), load_seconds)
+
+            entry = ModelEntry(keras_path, model_path, model, estimate_bytes(model_path, grown), load_seconds)
+            with self._lock:
+                self._entries[keras_path] = entry
+                self.loads += 1
+                self._evict(keep=keras_path)
+            logger.info(f"Registry loaded {entry.model_file} in {load_seconds:.1f}s "
+                        f"(~{entry.size_bytes / 1024 / 1024:.0f}MB)")
+            return entry
+        finally:
+            with self._lock:
+                self._loading.pop(keras_path, None)
+
+    def _evict(self, keep):
+        """Drop least recently used, unpinned models until under budget (call with the lock held)"""
+        evicted = False
+        for path in list(self._entries):
+            if self.used_bytes() <= self.max_bytes:
+                break
+            entry = self._entries[path]
+            if entry.pinned or path == keep:
+                continue
+            # Requests already holding the model keep it alive until they finish
+            del self._entries[path]
+            self.evictions += 1
+            evicted = True
+            logger.info(f"Registry evicted {entry.model_file} to stay under "
+                        f"{self.max_bytes / 1024 / 1024:.0f}MB")
+        if evicted:
+            gc.collect()
+
+    def used_bytes(self):
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': [entry.info() for entry in reversed(self._entries.values())],
+                'loading': [os.path.basename(path) for path in self._loading],
+                'available': [os.path.basename(path) for path in self.available()],
+                'used_mb': round(self.used_bytes() / 1024 / 1024, 1),
+                'max_mb': round(self.max_bytes / 1024 / 1024, 1),
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+
+def model_registry_config():
+    """Registry settings from the environment - MODEL_REGISTRY=0 turns per-request selection off"""
+    return {
+        'enabled': os.environ.get('MODEL_REGISTRY', '1') == '1',
+        'max_bytes': int(float(os.environ.get('MODEL_REGISTRY_MAX_MB', 768)) * 1024 * 1024),
+        'load_timeout': float(os.environ.get('MODEL_LOAD_TIMEOUT', 30)),
+        'preload': [name.strip() for name in os.environ.get('MODEL_PRELOAD', '').split(',') if name.strip()]
+    }
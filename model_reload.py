@@ -0,0 +1,163 @@
+"""
+Hot model reload for the Cookware Analyzer
+A watcher thread in each worker polls the model file the app would load now (the newest
+models/optimized_cookware_acc_*.keras) and a shared trigger file. When either changes, the
+new model is loaded and warmed on that thread while the old one keeps serving, then
+swapped in with a single reference assignment - requests already running finish on the
+model they started with. POST /api/admin/reload (or touching the trigger file) is the
+admin signal; it reaches every worker through the trigger file.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import logging
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def file_stamp(path):
+    """mtime_ns of path, or None when it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ModelReloader:
+    """Background watcher that calls reload_fn when the model source or trigger file changes.
+
+    source_fn returns an identity of the model file the app would load now;
+    reload_fn loads, warms and swaps in that model and returns its source.
+    With poll_seconds=0 models/ isn't watched, but the trigger file still is (every
+    TRIGGER_POLL_SECONDS), so an admin reload reaches every worker.
+    """
+
+    TRIGGER_POLL_SECONDS = 5.0
+
+    def __init__(self, reload_fn, source_fn, loaded_source, trigger_path, poll_seconds=5.0):
+        self.reload_fn = reload_fn
+        self.source_fn = source_fn
+        self.loaded_source = loaded_source
+        self.trigger_path = trigger_path
+        self.poll_seconds = float(poll_seconds)
+        self._trigger_stamp = file_stamp(trigger_path)
+        self._pending_source = None
+        self._failed_source = None
+        self._forced = False
+        self._wake = threading.Event()
+        self._reload_lock = threading.Lock()  # one reload at a time per process
+        self._thread = None
+        self.reloading = False
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload = None
+        self.last_seconds = None
+        self.last_error = None
+
+    def start(self):
+        """Start the watcher thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='model-watch', daemon=True)
+            self._thread.start()
+
+    def request(self, broadcast=True):
+        """Admin signal: reload this process now, in the background.
+
+        With broadcast the trigger file is touched too, so every other worker's watcher follows.
+        """
+        if broadcast:
+            with open(self.trigger_path, 'a'):
+                os.utime(self.trigger_path)
+            self._trigger_stamp = file_stamp(self.trigger_path)
+        self._forced = True
+        self.start()
+        self._wake.set()
+
+    def _changed(self):
+        """True when the trigger was touched, or the model source changed and has settled"""
+        stamp = file_stamp(self.trigger_path)
+        if stamp != self._trigger_stamp:
+            self._trigger_stamp = stamp
+            return True
+        if self.poll_seconds <= 0:
+            return False
+
+        source = self.source_fn()
+        if source is None or source == self.loaded_source or source == self._failed_source:
+            self._pending_source = None
+            return False
+        # A file still being copied into models/ keeps changing - wait until it holds still for a poll
+        if source != self._pending_source:
+            self._pending_source = source
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_seconds if self.poll_seconds > 0 else self.TRIGGER_POLL_SECONDS)
+            self._wake.clear()
+            forced, self._forced = self._forced, False
+            try:
+                if forced or self._changed():
+                    self.reload()
+            except Exception as e:
+                logger.error(f"Model watcher error: {str(e)}")
+
+    def reload(self):
+        """Load, warm and swap in the current model file now; True once it is serving"""
+        with self._reload_lock:
+            self.reloading = True
+            start = time.perf_counter()
+            try:
+                source = self.reload_fn()
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                self.failures += 1
+                self.last_error = str(e)
+                self._failed_source = self.source_fn()  # not retried until the file changes again
+                metrics.model_reload_finished(False, elapsed)
+                logger.error(f"Model reload failed after {elapsed:.1f}s - still serving the previous model: {e}")
+                return False
+            finally:
+                self.reloading = False
+
+            elapsed = time.perf_counter() - start
+            self.loaded_source = source
+            self._pending_source = None
+            self._failed_source = None
+            self.reloads += 1
+            self.last_reload = time.time()
+            self.last_seconds = elapsed
+            self.last_error = None
+            metrics.model_reload_finished(True, elapsed)
+            logger.info(f"Model reloaded in {elapsed:.1f}s: {source}")
+            return True
+
+    def stats(self):
+        return {
+            'watching': self.poll_seconds > 0,
+            'poll_seconds': self.poll_seconds,
+            'trigger_path': self.trigger_path,
+            'loaded_source': self.loaded_source,
+            'reloading': self.reloading,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_reload': self.last_reload,
+            'last_reload_seconds': round(self.last_seconds, 2) if self.last_seconds is not None else None,
+            'last_error': self.last_error
+        }
+
+
+def model_reload_config():
+    """Hot reload settings from the environment - MODEL_RELOAD=0 turns it off"""
+    return {
+        'enabled': os.environ.get('MODEL_RELOAD', '1') == '1',
+        'poll_seconds': float(os.environ.get('MODEL_WATCH_SECONDS', 5)),
+        'trigger_path': os.environ.get('MODEL_RELOAD_TRIGGER',
+                                       os.path.join(tempfile.gettempdir(), 'cookware-model-reload')),
+        'admin_token': os.environ.get('ADMIN_TOKEN', '')
+    }
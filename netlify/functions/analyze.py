@@ -1,47 +1,85 @@
 import json
 import base64
-import io
 import os
 import sys
-from PIL import Image
+import time
 import numpy as np
 import random
 from datetime import datetime
 
+# Container init starts here - used for the cold-vs-warm latency report
+_init_started = time.perf_counter()
+
 # Add parent directories to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-try:
-    import tensorflow as tf
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from model_cache import model_cache
+from lazy_imports import backend_available, module_available
+import inference
+import preprocessing
+import uploads
+
+# Checked with find_spec, without importing - the runtime itself loads on first inference
+TF_AVAILABLE = module_available('tensorflow')
+BACKEND_AVAILABLE = backend_available()
+
+class ModelRegistry:
+    """Resolves the model path once per container and keeps the loaded model warm"""
+
+    def __init__(self, candidate_paths, cache=model_cache):
+        self.candidate_paths = candidate_paths
+        self.cache = cache
+        self.model_path = None
+        self.resolved = False
+        self.prewarm_ms = None
+
+    def resolve(self):
+        """Find the first existing model file - the filesystem is only probed once"""
+        if not self.resolved:
+            for path in self.candidate_paths:
+                if os.path.exists(path):
+                    self.model_path = path
+                    print(f"Model path resolved: {path}")
+                    break
+            self.resolved = True
+        return self.model_path
+
+    def get(self):
+        """Return (model, cache_info), or (None, None) when no model file exists"""
+        model_path = self.resolve()
+        if model_path is None:
+            return None, None
+        return self.cache.get(inference.select_model_file(model_path))
+
+    def prewarm(self):
+        """Load the model during container init instead of on the first request"""
+        start = time.perf_counter()
+        try:
+            model, _ = self.get()
+        except Exception as e:
+            print(f"Model prewarm failed: {e}")
+            return False
+        self.prewarm_ms = round((time.perf_counter() - start) * 1000, 1)
+        if model is not None:
+            print(f"Model prewarmed in {self.prewarm_ms}ms")
+        return model is not None
+
+# Alternative paths for Netlify
+registry = ModelRegistry([
+    os.environ.get('MODEL_PATH', '/opt/build/repo/models/optimized_cookware_acc_0.2898.keras'),
+    os.path.join(os.path.dirname(__file__), '..', '..', 'models', 'optimized_cookware_acc_0.2898.keras'),
+    '/opt/build/repo/models/optimized_cookware_acc_0.2898.keras',
+    './models/optimized_cookware_acc_0.2898.keras'
+])
+
+# Invocations served by this container (the first one is the cold start)
+_invocation_count = 0
 
 def preprocess_image(image_data):
     """Preprocess image for model inference"""
     try:
-        # Decode base64 image
-        if 'data:image' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        # Convert to PIL Image
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize to model input size
-        image = image.resize((224, 224))
-        
-        # Convert to numpy array and normalize
-        image_array = np.array(image) / 255.0
-        
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
-        
-        return image_array
+        # Decode straight into this container's reusable float32 input buffer
+        return preprocessing.preprocess_image(image_data)
     except Exception as e:
         print(f"Image preprocessing failed: {e}")
         return None
@@ -100,35 +138,26 @@ def get_condition_details(predicted_class, confidence):
 def analyze_with_model(image_data):
     """Analyze with actual TensorFlow model"""
     try:
-        # Try to load model
-        model_path = os.environ.get('MODEL_PATH', '/opt/build/repo/models/optimized_cookware_acc_0.2898.keras')
-        
-        # Alternative paths for Netlify
-        possible_paths = [
-            model_path,
-            os.path.join(os.path.dirname(__file__), '..', '..', 'models', 'optimized_cookware_acc_0.2898.keras'),
-            '/opt/build/repo/models/optimized_cookware_acc_0.2898.keras',
-            './models/optimized_cookware_acc_0.2898.keras'
-        ]
-        
-        model = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                model = tf.keras.models.load_model(path)
-                print(f"Model loaded from: {path}")
-                break
+        # Model comes from the warm registry - only loads on a cold container
+        start = time.perf_counter()
+        model, cache_info = registry.get()
+        model_ms = (time.perf_counter() - start) * 1000
         
         if model is None:
             print("No model found, using fallback")
             return generate_mock_analysis()
         
         # Preprocess image
+        start = time.perf_counter()
         processed_image = preprocess_image(image_data)
+        preprocess_ms = (time.perf_counter() - start) * 1000
         if processed_image is None:
             return generate_mock_analysis()
         
         # Make prediction
-        predictions = model.predict(processed_image)
+        start = time.perf_counter()
+        predictions = inference.predict(model, processed_image)
+        inference_ms = (time.perf_counter() - start) * 1000
         class_names = ['minor', 'moderate', 'new', 'severe']
         predicted_class_idx = np.argmax(predictions[0])
         predicted_class = class_names[predicted_class_idx]
@@ -164,7 +193,14 @@ def analyze_with_model(image_data):
             'user': 'basil03p',
             'model_name': 'Optimized Cookware Classifier v2.0 (EfficientNetV2-B0)',
             'model_accuracy': '71.02%',
-            'deployment': 'netlify-functions'
+            'deployment': 'netlify-functions',
+            'model_cache': cache_info,
+            'inference_backend': inference.backend_of(model),
+            'latency': {
+                'model_ms': round(model_ms, 1),
+                'preprocess_ms': round(preprocess_ms, 1),
+                'inference_ms': round(inference_ms, 1)
+            }
         }
         
     except Exception as e:
@@ -271,6 +307,18 @@ def generate_mock_analysis():
         'deployment': 'netlify-functions'
     }
 
+def latency_report(stages, request_started):
+    """Cold-vs-warm latency breakdown attached to every analysis response"""
+    report = {
+        'cold_start': _invocation_count == 1,
+        'invocation': _invocation_count,
+        'container_init_ms': INIT_MS,
+        'prewarm_ms': registry.prewarm_ms,
+        'total_ms': round((time.perf_counter() - request_started) * 1000, 1)
+    }
+    report.update(stages)
+    return report
+
 def handler(event, context):
     """Netlify Functions handler for cookware analysis"""
     
@@ -297,11 +345,20 @@ def handler(event, context):
             'body': json.dumps({'error': 'Method not allowed'})
         }
     
+    global _invocation_count
+    _invocation_count += 1
+    request_started = time.perf_counter()
+    
     try:
-        # Parse request body
-        body = json.loads(event['body'])
+        # Raw image/* body, multipart/form-data upload or JSON base64 (legacy) -
+        # Netlify hands binary bodies over base64-encoded
+        body = event['body'] or ''
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body)
+        headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+        image_data, upload_mode = uploads.parse_upload(headers.get('content-type'), body)
         
-        if 'image' not in body:
+        if not image_data:
             return {
                 'statusCode': 400,
                 'headers': {
@@ -312,7 +369,9 @@ def handler(event, context):
             }
         
         # Analyze image
-        result = analyze_with_model(body['image']) if TF_AVAILABLE else generate_mock_analysis()
+        result = analyze_with_model(image_data) if BACKEND_AVAILABLE else generate_mock_analysis()
+        result['upload_mode'] = upload_mode
+        result['latency'] = latency_report(result.get('latency', {}), request_started)
         
         return {
             'statusCode': 200,
@@ -336,3 +395,9 @@ def handler(event, context):
                 'deployment': 'netlify-functions'
             })
         }
+
+# Prewarm hook - pay the model load during container init, not on the first request
+if BACKEND_AVAILABLE and os.environ.get('PREWARM_MODEL', '1') == '1':
+    registry.prewarm()
+
+INIT_MS = round((time.perf_counter() - _init_started) * 1000, 1)
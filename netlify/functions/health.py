@@ -6,11 +6,11 @@ from datetime import datetime
 # Add parent directories to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-try:
-    import tensorflow as tf
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from lazy_imports import backend_available, configured_backend, module_available
+
+# Checked with find_spec, without importing - health probes never pay the TF import
+TF_AVAILABLE = module_available('tensorflow')
+BACKEND_AVAILABLE = backend_available()
 
 def handler(event, context):
     """Netlify Functions handler for health check"""
@@ -91,6 +91,8 @@ def handler(event, context):
             },
             'deployment': 'netlify-functions',
             'tensorflow_available': TF_AVAILABLE,
+            'inference_backend': configured_backend(),
+            'backend_available': BACKEND_AVAILABLE,
             'model_loaded': model_exists,
             'model_path': found_model_path if model_exists else 'not_found',
             'available_models': available_models,
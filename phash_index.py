@@ -0,0 +1,165 @@
+"""
+Perceptual-hash near-duplicate index
+Re-compressed or rescaled copies of an already analysed photo land within a few bits
+(Hamming distance) of its 64-bit dHash. A BK-tree keeps lookups sublinear in the
+number of cached photos.
+
+An 8x8 dHash captures the layout of a photo, not scratches or coating wear: two different
+pans photographed the same way can be a few bits apart, and a match hands out the first
+pan's damage grade (and safety advice) without running the model. So the index is opt-in
+(PHASH_CACHE=1) and matches at distance 1 by default; validate any larger
+PHASH_MAX_DISTANCE on labelled pairs of different pans before raising it.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+HASH_SIZE = 8
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """64-bit difference hash of a PIL image: is each pixel brighter than its right neighbour?"""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    width = hash_size + 1
+    value = 0
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance"""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value):
+        if self.root is None:
+            self.root = (value, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (value, {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """All (distance, hash) pairs within max_distance of value"""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_value, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                matches.append((distance, node_value))
+            # Triangle inequality: only subtrees in [d - r, d + r] can hold matches
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return matches
+
+
+class NearDuplicateIndex:
+    """dHash -> cached value map with BK-tree lookup, LRU bound, TTL and model invalidation"""
+
+    def __init__(self, max_distance=4, max_entries=10000, ttl_seconds=3600):
+        self.max_distance = int(max_distance)
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+        self._entries = OrderedDict()  # hash -> (value, expires)
+        self._tree = BKTree()
+        self._lock = threading.Lock()
+        self._model_identity = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_model(self, model_identity):
+        """Drop everything computed with a different model (call with the lock held)"""
+        if model_identity != self._model_identity:
+            self._entries.clear()
+            self._tree = BKTree()
+            self._model_identity = model_identity
+
+    def lookup(self, image_hash, model_identity):
+        """(value, distance) of the closest live entry within max_distance, or None"""
+        now = time.monotonic()
+        with self._lock:
+            self._check_model(model_identity)
+            best = None
+            for distance, candidate in self._tree.search(image_hash, self.max_distance):
+                entry = self._entries.get(candidate)
+                if entry is None:
+                    continue  # evicted - still in the tree until the next rebuild
+                if entry[1] <= now:
+                    del self._entries[candidate]
+                    continue
+                if best is None or distance < best[1]:
+                    best = (candidate, distance)
+
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best[0])
+            self.hits += 1
+            return self._entries[best[0]][0], best[1]
+
+    def add(self, image_hash, model_identity, value):
+        with self._lock:
+            self._check_model(model_identity)
+            self._entries[image_hash] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(image_hash)
+            self._tree.add(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            # Rebuild once evicted hashes make up most of the tree
+            if self._tree.size > 2 * max(1, len(self._entries)):
+                self._tree = BKTree()
+                for live_hash in self._entries:
+                    self._tree.add(live_hash)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'tree_nodes': self._tree.size,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+
+def phash_config():
+    """Near-duplicate lookup settings - off unless PHASH_CACHE=1 (see the module docstring)"""
+    return {
+        'enabled': os.environ.get('PHASH_CACHE', '0') == '1',
+        'max_distance': int(os.environ.get('PHASH_MAX_DISTANCE', 1)),
+        'max_entries': int(os.environ.get('PHASH_MAX_ENTRIES', 10000)),
+        'ttl_seconds': float(os.environ.get('RESULT_CACHE_TTL', 3600))
+    }
@@ -0,0 +1,140 @@
+"""
+Shared image preprocessing for the Flask, Vercel and Netlify entry points
+Decoded pixels are scaled straight into a preallocated float32 batch buffer, so a
+request no longer allocates a float64 copy plus an expand_dims copy of every image
+"""
+
+import base64
+import io
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+import metrics
+
+IMAGE_SIZE = (224, 224)
+SCALE = np.float32(1.0 / 255.0)
+
+# JPEG draft decoding - libjpeg scales by 1/2, 1/4 or 1/8 during decode, so a 12MP
+# phone photo is never fully decoded. OVERSAMPLE asks for that many times the model
+# size before the final resize (1 = smallest scale that still covers 224x224).
+JPEG_DRAFT = os.environ.get('JPEG_DRAFT', '1') == '1'
+JPEG_DRAFT_OVERSAMPLE = int(os.environ.get('JPEG_DRAFT_OVERSAMPLE', 1))
+# Pillow formats decoded by libjpeg - MPO is a JPEG with extra pictures appended
+JPEG_FORMATS = ('JPEG', 'MPO')
+
+
+class InputBuffer:
+    """Reusable float32 (max_batch, H, W, 3) model input buffer"""
+
+    def __init__(self, max_batch=1, image_size=IMAGE_SIZE):
+        self.image_size = image_size
+        width, height = image_size
+        self.array = np.empty((max_batch, height, width, 3), dtype=np.float32)
+
+    @property
+    def max_batch(self):
+        return self.array.shape[0]
+
+    def ensure_capacity(self, batch_size):
+        """Grow the buffer (once) if a larger batch is requested"""
+        if batch_size > self.max_batch:
+            width, height = self.image_size
+            self.array = np.empty((batch_size, height, width, 3), dtype=np.float32)
+
+    def write(self, index, image):
+        """Scale an RGB PIL image of image_size into slot index - no float64 temporaries"""
+        with metrics.timed('normalize'):
+            pixels = np.asarray(image, dtype=np.uint8)
+            np.multiply(pixels, SCALE, out=self.array[index], dtype=np.float32)
+
+    def batch(self, size):
+        """View of the first size slots (no copy)"""
+        return self.array[:size]
+
+
+# One buffer per thread: a request thread owns its buffer until it calls preprocess again
+_local = threading.local()
+
+
+def thread_buffer(batch_size=1):
+    """This thread's input buffer, sized for at least batch_size images"""
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None:
+        buffer = _local.buffer = InputBuffer(max_batch=batch_size)
+    buffer.ensure_capacity(batch_size)
+    return buffer
+
+
+def decode_base64_image(image_data):
+    """Image bytes from a data URL or bare base64 string"""
+    with metrics.timed('base64_decode'):
+        if 'data:image' in image_data:
+            image_data = image_data.split(',')[1]
+        return base64.b64decode(image_data)
+
+
+def image_bytes(source):
+    """Encoded image bytes from a base64 / data URL string, bytes or binary file object"""
+    if isinstance(source, str):
+        return decode_base64_image(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    return source.read()
+
+
+def load_image(source, image_size=IMAGE_SIZE, draft=None):
+    """Decode encoded bytes or a binary file object, convert to RGB and resize"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with metrics.timed('image_decode'):
+        image = Image.open(source)
+
+        # Reduced-resolution decode for JPEGs - including phone JPEGs with a multi-picture
+        # segment (gain map, depth), which Pillow opens as MPO; other formats decode in full
+        if (JPEG_DRAFT if draft is None else draft) and image.format in JPEG_FORMATS:
+            width, height = image_size
+            image.draft('RGB', (width * JPEG_DRAFT_OVERSAMPLE, height * JPEG_DRAFT_OVERSAMPLE))
+
+        # Decode now, so the resize below is timed on its own
+        image.load()
+
+        # Convert to RGB if necessary
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+    # Final high-quality resize from the (possibly DCT-scaled) image
+    with metrics.timed('resize'):
+        return image.resize(image_size, Image.Resampling.BICUBIC)
+
+
+def preprocess_bytes(source):
+    """Encoded image bytes (or a binary file object) -> float32 (1, 224, 224, 3) batch.
+
+    The result is a view of this thread's reusable buffer and stays valid until the
+    thread preprocesses its next image; copy it if it must outlive the request.
+    """
+    buffer = thread_buffer(1)
+    buffer.write(0, load_image(source, buffer.image_size))
+    return buffer.batch(1)
+
+
+def preprocess_image(image_data):
+    """Base64 / data URL string, raw bytes or file object -> float32 (1, 224, 224, 3) batch"""
+    if isinstance(image_data, str):
+        image_data = decode_base64_image(image_data)
+    return preprocess_bytes(image_data)
+
+
+def preprocess_image_with_hash(image_data):
+    """Like preprocess_image, plus the 64-bit dHash of the decoded image for near-duplicate lookup"""
+    from phash_index import dhash
+
+    if isinstance(image_data, str):
+        image_data = decode_base64_image(image_data)
+    buffer = thread_buffer(1)
+    image = load_image(image_data, buffer.image_size)
+    buffer.write(0, image)
+    return buffer.batch(1), dhash(image)
@@ -119,23 +119,13 @@ async function analyzeImage() {
         // Simulate analysis progress
         await simulateProgress();
         
-        // Convert image to base64
-        const reader = new FileReader();
-        const imageData = await new Promise((resolve, reject) => {
-            reader.onload = () => resolve(reader.result);
-            reader.onerror = reject;
-            reader.readAsDataURL(currentFile);
-        });
-        
-        // Call API
+        // Call API - send the file as a raw image body (no base64 / JSON overhead)
         const response = await fetch('/api/analyze', {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json',
+                'Content-Type': currentFile.type || 'application/octet-stream',
             },
-            body: JSON.stringify({
-                image: imageData
-            })
+            body: currentFile
         });
         
         if (!response.ok) {
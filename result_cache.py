@@ -0,0 +1,135 @@
+"""
+Content-addressed cache of analysis results
+Keyed by a fast hash of the uploaded image bytes plus the identity of the loaded model,
+bounded by memory with LRU eviction and a TTL. Entries for a previous model are dropped
+as soon as a different model identity is seen.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry bookkeeping cost (key string, OrderedDict node, tuple) on top of the value
+ENTRY_OVERHEAD_BYTES = 256
+
+
+def model_identity(model_path, backend=None):
+    """Identity of a model file - changes whenever the file is replaced on disk"""
+    try:
+        stat = os.stat(model_path)
+        return f"{os.path.basename(model_path)}:{stat.st_size}:{stat.st_mtime_ns}:{backend or ''}"
+    except OSError:
+        return f"{os.path.basename(model_path)}:missing:{backend or ''}"
+
+
+def value_size(value):
+    """Approximate memory held by a cached value"""
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes) + ENTRY_OVERHEAD_BYTES
+    return sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache bounded by approximate memory size"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl_seconds=3600):
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl_seconds)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_identity = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, image_bytes, model_identity):
+        """Cache key for an upload; a new model identity invalidates all older entries"""
+        if model_identity != self._model_identity:
+            with self._lock:
+                if model_identity != self._model_identity:
+                    if self._entries:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self.current_bytes = 0
+                    self._model_identity = model_identity
+        digest = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        return f"{model_identity}|{digest}"
+
+    def get(self, key):
+        """Cached value for key, or None (expired entries count as misses)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires = entry
+            if expires <= now:
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value, evicting least-recently-used entries to stay under max_bytes"""
+        size = value_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not key.startswith(f"{self._model_identity}|"):
+                return  # computed against a model that has since been replaced
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                evicted_key, (_, evicted_size, _) = next(iter(self._entries.items()))
+                self._remove(evicted_key, evicted_size)
+                self.evictions += 1
+
+    def _remove(self, key, size):
+        del self._entries[key]
+        self.current_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Counters for the response metadata and /api/stats"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'model_identity': self._model_identity
+            }
+
+
+def result_cache_config():
+    """Cache settings from the environment - RESULT_CACHE=0 disables it"""
+    return {
+        'enabled': os.environ.get('RESULT_CACHE', '1') == '1',
+        'max_bytes': int(float(os.environ.get('RESULT_CACHE_MAX_MB', 16)) * 1024 * 1024),
+        'ttl_seconds': float(os.environ.get('RESULT_CACHE_TTL', 3600))
+    }
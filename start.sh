@@ -24,7 +24,10 @@ fi
 
 # Start the application with gunicorn for better production performance
 # Use gunicorn for production, fallback to python app.py for development
-if [ "$FLASK_ENV" = "production" ]; then
+if [ "$SERVER_MODE" = "asgi" ]; then
+    echo "Starting with gunicorn + uvicorn workers (ASGI mode)"
+    exec gunicorn --config gunicorn.conf.py asgi:app
+elif [ "$FLASK_ENV" = "production" ]; then
     echo "Starting with gunicorn (production mode)"
     exec gunicorn --config gunicorn.conf.py app:app
 else
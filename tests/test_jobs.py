@@ -0,0 +1,91 @@
+"""
+JobStore / JobRunner failure paths - a job whose outcome can't be stored must not stay running
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jobs import JobRunner, JobStore
+
+
+class FlakyStore(JobStore):
+    """JobStore whose finish() raises 'database is locked' the first `failures` times"""
+
+    def __init__(self, path, failures, **kwargs):
+        super().__init__(path, **kwargs)
+        self.failures = failures
+
+    def finish(self, job_id, result=None, error=None):
+        if self.failures > 0:
+            self.failures -= 1
+            raise sqlite3.OperationalError('database is locked')
+        super().finish(job_id, result=result, error=error)
+
+
+def runner_for(store):
+    runner = JobRunner(store, lambda images: {'images': len(images)}, poll_seconds=0.01)
+    runner.FINISH_BACKOFF = (0, 0)
+    return runner
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite3')
+
+
+def test_finish_retried_until_stored(db_path):
+    store = FlakyStore(db_path, failures=2)
+    job_id = store.submit([b'a', b'b'])
+    runner_for(store)._step()
+    job = store.get(job_id)
+    assert job['status'] == 'done'
+    assert job['result'] == {'images': 2}
+
+
+def test_unstorable_outcome_is_requeued(db_path):
+    store = FlakyStore(db_path, failures=3, max_attempts=2)
+    job_id = store.submit([b'a'])
+    runner_for(store)._step()
+    job = store.get(job_id)
+    assert job['status'] == 'queued'
+    assert job['attempts'] == 1
+
+    # Second attempt stores fine
+    runner_for(store)._step()
+    assert store.get(job_id)['status'] == 'done'
+
+
+def test_unstorable_outcome_fails_after_max_attempts(db_path):
+    store = FlakyStore(db_path, failures=100, max_attempts=1)
+    job_id = store.submit([b'a'])
+    runner_for(store)._step()
+    job = store.get(job_id)
+    assert job['status'] == 'failed'
+    assert 'error' in job
+
+
+def test_recover_reclaims_own_jobs_not_held(db_path):
+    store = JobStore(db_path)
+    held_id = store.submit([b'a'])
+    orphan_id = store.submit([b'b'])
+    store.claim()
+    store.claim()
+    # Both rows are running under this (live) pid; only one is still being worked on
+    assert store.recover(held={held_id}) == 1
+    assert store.get(held_id)['status'] == 'running'
+    assert store.get(orphan_id)['status'] == 'queued'
+
+
+def test_recover_skips_other_live_workers(db_path):
+    store = JobStore(db_path)
+    job_id = store.submit([b'a'])
+    store.claim()
+    with sqlite3.connect(db_path) as db:
+        db.execute('UPDATE jobs SET worker_pid = ? WHERE id = ?', (os.getppid(), job_id))
+    assert store.recover() == 0
+    assert store.get(job_id)['status'] == 'running'
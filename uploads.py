@@ -0,0 +1,52 @@
+"""
+Request body parsing for /api/analyze on the serverless entry points
+Accepts raw image/* bodies, multipart/form-data (field 'image') and the original
+JSON {"image": "<data URL>"} mode. The Flask app uses werkzeug's streaming parser instead.
+"""
+
+import json
+from email.parser import BytesParser
+from email.policy import HTTP
+
+RAW_TYPES = ('application/octet-stream',)
+
+
+def mime_type(content_type):
+    """'multipart/form-data; boundary=x' -> 'multipart/form-data'"""
+    return (content_type or '').split(';')[0].strip().lower()
+
+
+def is_raw_image(content_type):
+    mime = mime_type(content_type)
+    return mime.startswith('image/') or mime in RAW_TYPES
+
+
+def multipart_image(content_type, body, field='image'):
+    """Bytes of the named file field in a multipart/form-data body, or None"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+    )
+    if not message.is_multipart():
+        return None
+    for part in message.iter_parts():
+        if part.get_param('name', header='content-disposition') == field:
+            return part.get_payload(decode=True)
+    return None
+
+
+def parse_upload(content_type, body):
+    """Return (image, mode): image is bytes for raw/multipart, a base64 string for JSON.
+
+    image is None when the request carries no image; invalid JSON raises ValueError.
+    """
+    if is_raw_image(content_type):
+        return (body or None), 'raw'
+    if mime_type(content_type) == 'multipart/form-data':
+        return multipart_image(content_type, body), 'multipart'
+
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8')
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        return None, 'json'
+    return data.get('image'), 'json'